@@ -8,13 +8,42 @@ class BotConfig:
         self.default_config = {
             "mod_log_channel": None,
             "default_mute_role": "Muted",
+            "default_mute_backend": "role",
             "max_warnings": 3,
             "auto_ban_on_max_warnings": False,
             "log_all_actions": True,
             "embed_color": 0x2F3136,
             "success_color": 0x00FF00,
             "error_color": 0xFF0000,
-            "warning_color": 0xFFFF00
+            "warning_color": 0xFFFF00,
+            "storage_backend": "sqlite",
+            "db_group_commit": False,
+            "db_commit_interval_ms": 50,
+            "db_commit_max_batch": 100,
+            "db_wal_mode": False,
+            "db_reader_pool_size": 4,
+            "db_archive_path": None,
+            "db_instrumentation": True,
+            "db_slow_query_ms": 100,
+            "backup_interval_hours": 24,
+            "backup_generations": 7,
+            "backup_directory": "backups",
+            "backup_pages_per_step": 256,
+            "bulk_initial_concurrency": 2,
+            "bulk_max_concurrency": 8,
+            "bulk_progress_interval": 5,
+            "lockdown_concurrency": 10,
+            "snapshot_restore_concurrency": 10,
+            "mute_provision_concurrency": 5,
+            "automod_user_messages": 5,
+            "automod_user_seconds": 5,
+            "automod_channel_messages": 30,
+            "automod_channel_seconds": 10,
+            "automod_action": "both",
+            "automod_timeout_seconds": 300,
+            "automod_max_tracked_users": 5000,
+            "automod_max_tracked_channels": 500,
+            "automod_max_tracked_guilds": 1000
         }
         self.config = self.load_config()
     
@@ -0,0 +1,252 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.permissions import has_admin_permissions, convert_duration, format_duration
+from utils.logging_utils import ModerationLogger
+from utils.mute_scheduler import MAX_TIMEOUT_SECONDS
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Literal, Optional
+import logging
+import time
+
+AUTOMOD_SETTING = "automod"
+
+# Marks a guild whose settings haven't been loaded yet; disabled guilds are cached as None
+NOT_LOADED = object()
+
+class TokenBucket:
+    """Messages a key may still send; refilled continuously and updated in place"""
+
+    __slots__ = ('tokens', 'updated', 'strikes')
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+        # Consecutive limited messages, so actions and logs fire once per burst
+        self.strikes = 0
+
+class RateLimiter:
+    """Token buckets for up to max_keys keys, evicting the least recently active key
+
+    A message costs one token; buckets refill at capacity tokens per period.
+    Existing buckets are updated in place and reordered with move_to_end, so
+    steady traffic from known users allocates nothing.
+    """
+
+    def __init__(self, capacity: int, period: float, max_keys: int):
+        self.capacity = float(capacity)
+        self.refill = capacity / period
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+
+    def hit(self, key: int, now: float) -> int:
+        """Spend a token for key; returns 0 if allowed, otherwise the strike count of the current burst"""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.capacity, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+            bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.refill)
+            bucket.updated = now
+
+        if bucket.tokens >= 1.0:
+            bucket.tokens -= 1.0
+            bucket.strikes = 0
+            return 0
+
+        bucket.strikes += 1
+        return bucket.strikes
+
+class GuildAutomod:
+    """A guild's automod settings and its live per-user and per-channel limiters"""
+
+    __slots__ = ('settings', 'users', 'channels')
+
+    def __init__(self, settings: Dict[str, Any], max_users: int, max_channels: int):
+        self.settings = settings
+        self.users = RateLimiter(settings['user_messages'], settings['user_seconds'], max_users)
+        self.channels = RateLimiter(settings['channel_messages'], settings['channel_seconds'], max_channels)
+
+class AutoMod(commands.GroupCog, name="automod", description="Automatic spam and flood protection"):
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = ModerationLogger(bot)
+        # Least recently active guilds are evicted first, like the per-user buckets
+        self.guilds: "OrderedDict[int, Optional[GuildAutomod]]" = OrderedDict()
+        super().__init__()
+
+    def default_settings(self) -> Dict[str, Any]:
+        config = self.bot.config
+        return {
+            'enabled': False,
+            'user_messages': config.get('automod_user_messages', 5),
+            'user_seconds': config.get('automod_user_seconds', 5),
+            'channel_messages': config.get('automod_channel_messages', 30),
+            'channel_seconds': config.get('automod_channel_seconds', 10),
+            'action': config.get('automod_action', 'both'),
+            'timeout_seconds': config.get('automod_timeout_seconds', 300)
+        }
+
+    async def get_settings(self, guild_id: int) -> Dict[str, Any]:
+        stored = await self.bot.db.get_guild_setting(guild_id, AUTOMOD_SETTING) or {}
+        return {**self.default_settings(), **stored}
+
+    async def load_guild(self, guild_id: int) -> Optional[GuildAutomod]:
+        """Build a guild's limiters from its settings, or None when automod is disabled there"""
+        settings = await self.get_settings(guild_id)
+        state = None
+        if settings['enabled']:
+            state = GuildAutomod(
+                settings,
+                self.bot.config.get('automod_max_tracked_users', 5000),
+                self.bot.config.get('automod_max_tracked_channels', 500)
+            )
+
+        self.guilds[guild_id] = state
+        self.guilds.move_to_end(guild_id)
+        if len(self.guilds) > self.bot.config.get('automod_max_tracked_guilds', 1000):
+            self.guilds.popitem(last=False)
+        return state
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.author.bot:
+            return
+
+        state = self.guilds.get(message.guild.id, NOT_LOADED)
+        if state is NOT_LOADED:
+            state = await self.load_guild(message.guild.id)
+        else:
+            self.guilds.move_to_end(message.guild.id)
+        if state is None:
+            return
+
+        # Moderators are exempt and don't spend channel tokens that regular members would be limited by
+        if not isinstance(message.author, discord.Member) or message.author.guild_permissions.manage_messages:
+            return
+
+        now = time.monotonic()
+        user_strikes = state.users.hit(message.author.id, now)
+        channel_strikes = state.channels.hit(message.channel.id, now)
+        if not user_strikes and not channel_strikes:
+            return
+
+        try:
+            if user_strikes:
+                await self.handle_user_flood(message, state.settings, user_strikes)
+            else:
+                await self.handle_channel_flood(message, state.settings, channel_strikes)
+        except discord.HTTPException as e:
+            logging.warning(f"Automod action failed in {message.guild.name}: {e}")
+
+    async def handle_user_flood(self, message: discord.Message, settings: Dict[str, Any], strikes: int):
+        action = settings['action']
+        if action in ('delete', 'both'):
+            await message.delete()
+
+        # Time out and log once per burst; later messages in the burst are only deleted
+        if strikes != 1:
+            return
+
+        rate = f"{settings['user_messages']} messages per {settings['user_seconds']}s"
+        details = f"Channel: {message.channel.mention}\nLimit: {rate}"
+        if action in ('timeout', 'both'):
+            duration = timedelta(seconds=min(settings['timeout_seconds'], MAX_TIMEOUT_SECONDS))
+            await message.author.timeout(duration, reason="Automod: message flood")
+            details += f"\nTimeout: {format_duration(int(duration.total_seconds()))}"
+
+        await self.logger.log_action(
+            message.guild, "Automod", message.guild.me, message.author, "Message flood",
+            details=details,
+            color=0xFF8000
+        )
+
+    async def handle_channel_flood(self, message: discord.Message, settings: Dict[str, Any], strikes: int):
+        # A channel flood has no single member to time out, so only the delete part of the action applies
+        deleting = settings['action'] in ('delete', 'both')
+        if deleting:
+            await message.delete()
+
+        if strikes == 1:
+            rate = f"{settings['channel_messages']} messages per {settings['channel_seconds']}s"
+            outcome = "Messages over the channel limit are being deleted" if deleting else "Messages are not deleted (action: timeout)"
+            await self.logger.log_action(
+                message.guild, "Automod", message.guild.me, None, "Channel flood",
+                details=f"Channel: {message.channel.mention}\nLimit: {rate}\n{outcome}",
+                color=0xFF8000
+            )
+
+    @app_commands.command(name="status", description="Show this server's automod settings")
+    @has_admin_permissions()
+    async def status(self, interaction: discord.Interaction):
+        settings = await self.get_settings(interaction.guild.id)
+        state = self.guilds.get(interaction.guild.id)
+
+        embed = discord.Embed(
+            title="🛡️ Automod",
+            description="✅ Enabled" if settings['enabled'] else "⏸️ Disabled",
+            color=0x00FF00 if settings['enabled'] else 0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Per User", value=f"{settings['user_messages']} messages / {settings['user_seconds']}s", inline=True)
+        embed.add_field(name="Per Channel", value=f"{settings['channel_messages']} messages / {settings['channel_seconds']}s", inline=True)
+        embed.add_field(name="Action", value=settings['action'], inline=True)
+        embed.add_field(name="Timeout", value=format_duration(settings['timeout_seconds']), inline=True)
+        if state:
+            embed.add_field(name="Tracked", value=f"{len(state.users.buckets)} users, {len(state.channels.buckets)} channels", inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="set", description="Configure automod; omitted options keep their current value")
+    @app_commands.describe(
+        enabled="Turn automod on or off",
+        user_messages="Messages a user may send per window",
+        user_seconds="Length of the per-user window in seconds",
+        channel_messages="Messages a channel may receive per window",
+        channel_seconds="Length of the per-channel window in seconds",
+        action="What to do when a user floods: delete messages, time out, or both",
+        timeout="Timeout length for flooding users (e.g., 5m, 1h)"
+    )
+    @has_admin_permissions()
+    async def configure(self, interaction: discord.Interaction, enabled: bool = None,
+                  user_messages: app_commands.Range[int, 1, 100] = None,
+                  user_seconds: app_commands.Range[int, 1, 300] = None,
+                  channel_messages: app_commands.Range[int, 1, 1000] = None,
+                  channel_seconds: app_commands.Range[int, 1, 300] = None,
+                  action: Literal['delete', 'timeout', 'both'] = None, timeout: str = None):
+        settings = await self.get_settings(interaction.guild.id)
+
+        if timeout is not None:
+            timeout_seconds = convert_duration(timeout)
+            if not 0 < timeout_seconds <= MAX_TIMEOUT_SECONDS:
+                await interaction.response.send_message("❌ Timeout must be between 1s and 28d (e.g., 5m).", ephemeral=True)
+                return
+            settings['timeout_seconds'] = timeout_seconds
+
+        changes = {
+            'enabled': enabled, 'user_messages': user_messages, 'user_seconds': user_seconds,
+            'channel_messages': channel_messages, 'channel_seconds': channel_seconds, 'action': action
+        }
+        settings.update({key: value for key, value in changes.items() if value is not None})
+
+        await self.bot.db.set_guild_setting(interaction.guild.id, AUTOMOD_SETTING, settings)
+        # Rebuild the limiters with the new rates
+        await self.load_guild(interaction.guild.id)
+
+        await self.logger.log_action(
+            interaction.guild, "Automod Update", interaction.user,
+            details=f"Enabled: {settings['enabled']}\nUser: {settings['user_messages']}/{settings['user_seconds']}s\n"
+                    f"Channel: {settings['channel_messages']}/{settings['channel_seconds']}s\nAction: {settings['action']}",
+            color=0x2F3136
+        )
+
+        embed = await self.logger.create_success_embed(
+            "Automod Updated",
+            f"Automod is **{'enabled' if settings['enabled'] else 'disabled'}**. Use `/automod status` to review the settings."
+        )
+        await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(AutoMod(bot))
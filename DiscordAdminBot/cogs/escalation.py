@@ -0,0 +1,111 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.permissions import has_admin_permissions, convert_duration
+from utils.logging_utils import ModerationLogger
+from utils.escalation import ESCALATION_SETTING, describe_rule
+from utils.mute_scheduler import MAX_TIMEOUT_SECONDS
+from datetime import datetime
+from typing import Literal
+
+MAX_RULES = 10
+
+class Escalation(commands.GroupCog, name="escalation", description="Automatic actions when members reach warning thresholds"):
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = ModerationLogger(bot)
+        super().__init__()
+
+    @app_commands.command(name="list", description="Show this server's warning escalation ladder")
+    @has_admin_permissions()
+    async def list_rules(self, interaction: discord.Interaction):
+        ladder = await self.bot.escalation.get_ladder(interaction.guild.id)
+        custom = await self.bot.db.get_guild_setting(interaction.guild.id, ESCALATION_SETTING) is not None
+
+        embed = discord.Embed(
+            title="🔺 Warning Escalation",
+            description="\n".join(f"**{index}.** {describe_rule(rule)}" for index, rule in enumerate(ladder, 1))
+            or "No escalation rules; warnings never trigger automatic actions.",
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text="Custom ladder" if custom else "Using the bot's max_warnings defaults")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="add", description="Add an escalation rule")
+    @app_commands.describe(
+        warnings="Number of warnings that triggers the rule",
+        action="What to do when the rule triggers",
+        days="Only count warnings from this many days (leave empty for all time)",
+        duration="Timeout length (e.g., 1h, 1d); required for timeout"
+    )
+    @has_admin_permissions()
+    async def add(self, interaction: discord.Interaction, warnings: app_commands.Range[int, 1, 100],
+                  action: Literal['timeout', 'kick', 'ban'], days: app_commands.Range[int, 1, 365] = None,
+                  duration: str = None):
+        seconds = None
+        if action == 'timeout':
+            seconds = convert_duration(duration) if duration else 0
+            if not 0 < seconds <= MAX_TIMEOUT_SECONDS:
+                await interaction.response.send_message("❌ Timeout rules need a duration between 1s and 28d (e.g., 1h).", ephemeral=True)
+                return
+
+        ladder = await self.bot.escalation.get_ladder(interaction.guild.id)
+        if len(ladder) >= MAX_RULES:
+            await interaction.response.send_message(f"❌ A ladder can have at most {MAX_RULES} rules.", ephemeral=True)
+            return
+
+        rule = {'warnings': warnings, 'days': days, 'action': action, 'duration': seconds}
+        await self.bot.escalation.set_ladder(interaction.guild.id, ladder + [rule])
+
+        await self.logger.log_action(
+            interaction.guild, "Escalation Update", interaction.user,
+            details=f"Added rule: {describe_rule(rule)}",
+            color=0x2F3136
+        )
+
+        embed = await self.logger.create_success_embed("Escalation Rule Added", describe_rule(rule))
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="remove", description="Remove an escalation rule")
+    @app_commands.describe(number="The rule number shown in /escalation list")
+    @has_admin_permissions()
+    async def remove(self, interaction: discord.Interaction, number: int):
+        ladder = await self.bot.escalation.get_ladder(interaction.guild.id)
+        if not 1 <= number <= len(ladder):
+            await interaction.response.send_message(f"❌ No rule #{number}.", ephemeral=True)
+            return
+
+        # get_ladder returns the cached setting; change a copy so a failed write leaves it intact
+        ladder = list(ladder)
+        rule = ladder.pop(number - 1)
+        await self.bot.escalation.set_ladder(interaction.guild.id, ladder)
+
+        await self.logger.log_action(
+            interaction.guild, "Escalation Update", interaction.user,
+            details=f"Removed rule: {describe_rule(rule)}",
+            color=0x2F3136
+        )
+
+        embed = await self.logger.create_success_embed("Escalation Rule Removed", describe_rule(rule))
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="reset", description="Go back to the bot's default max_warnings behaviour")
+    @has_admin_permissions()
+    async def reset(self, interaction: discord.Interaction):
+        await self.bot.db.set_guild_setting(interaction.guild.id, ESCALATION_SETTING, None)
+
+        await self.logger.log_action(
+            interaction.guild, "Escalation Update", interaction.user,
+            details="Reset to defaults",
+            color=0x2F3136
+        )
+
+        embed = await self.logger.create_success_embed(
+            "Escalation Reset",
+            "This server now uses the bot's default `max_warnings` behaviour."
+        )
+        await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Escalation(bot))
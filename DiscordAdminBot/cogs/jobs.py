@@ -0,0 +1,89 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.permissions import has_admin_permissions
+from utils.logging_utils import ModerationLogger
+from utils.jobs import JobManager
+from database import RESUMABLE_JOB_STATUSES
+from datetime import datetime
+
+class Jobs(commands.GroupCog, name="jobs", description="Inspect and cancel long-running background jobs"):
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = ModerationLogger(bot)
+        super().__init__()
+
+    @app_commands.command(name="list", description="Show this server's most recent background jobs")
+    @has_admin_permissions()
+    async def list_jobs(self, interaction: discord.Interaction):
+        rows = await self.bot.db.get_jobs(interaction.guild.id, limit=15)
+
+        embed = discord.Embed(
+            title="⚙️ Background Jobs",
+            description="\n".join(JobManager.describe(row) for row in rows) or "No jobs have been run in this server.",
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text="Use /jobs status for details")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="status", description="Show the progress of a background job")
+    @app_commands.describe(job_id="The job ID shown in /jobs list")
+    @has_admin_permissions()
+    async def status(self, interaction: discord.Interaction, job_id: int):
+        row = await self.bot.db.get_job(job_id)
+        if not row or row['guild_id'] != interaction.guild.id:
+            await interaction.response.send_message(f"❌ No job #{job_id} found in this server.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"⚙️ Job #{row['id']}",
+            description=JobManager.describe(row),
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Type", value=row['job_type'], inline=True)
+        embed.add_field(name="Started By", value=f"<@{row['created_by']}>", inline=True)
+        embed.add_field(name="Progress", value=f"{row['processed']}/{row['total']}", inline=True)
+        embed.add_field(name="Succeeded", value=str(row['succeeded']), inline=True)
+        embed.add_field(name="Failed", value=str(row['failed']), inline=True)
+        embed.add_field(
+            name="Updated",
+            value=f"<t:{row['updated_epoch']}:R> (created <t:{row['created_epoch']}:R>)",
+            inline=True
+        )
+        if row['error']:
+            embed.add_field(name="Error", value=row['error'][:1000], inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="cancel", description="Stop a running background job")
+    @app_commands.describe(job_id="The job ID shown in /jobs list")
+    @has_admin_permissions()
+    async def cancel(self, interaction: discord.Interaction, job_id: int):
+        row = await self.bot.db.get_job(job_id)
+        if not row or row['guild_id'] != interaction.guild.id:
+            await interaction.response.send_message(f"❌ No job #{job_id} found in this server.", ephemeral=True)
+            return
+
+        if not self.bot.jobs.cancel(job_id):
+            if row['status'] not in RESUMABLE_JOB_STATUSES:
+                await interaction.response.send_message(f"❌ Job #{job_id} is not running ({row['status']}).", ephemeral=True)
+                return
+            # Not running in this process (e.g. waiting to resume); make sure it won't be picked up
+            await self.bot.db.set_job_status(job_id, 'cancelled')
+
+        await self.logger.log_action(
+            interaction.guild, "Job Cancelled", interaction.user,
+            details=f"Job #{job_id} ({row['job_type']})",
+            color=0xFFFF00
+        )
+
+        embed = await self.logger.create_success_embed(
+            "Job Cancelled",
+            f"Job #{job_id} (`{row['job_type']}`) will stop after the items already in progress."
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Jobs(bot))
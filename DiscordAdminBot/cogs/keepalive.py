@@ -33,7 +33,7 @@ class KeepAlive(commands.Cog):
             if hasattr(self.bot, 'db') and self.bot.db:
                 try:
                     # Simple database ping to keep connection alive
-                    await self.bot.db.db.execute("SELECT 1")
+                    await self.bot.db.ping()
                 except:
                     pass  # Silent fail, just for keepalive
             
@@ -0,0 +1,264 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+from utils.permissions import has_admin_permissions
+from utils.logging_utils import ModerationLogger
+from utils.backups import create_backup
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+RETENTION_SETTING = "mod_log_retention_days"
+RETENTION_BATCH_SIZE = 1000
+WARNING_EXPIRY_SETTING = "warning_expiry_days"
+WARNING_EXPIRY_BATCH_SIZE = 1000
+
+class Maintenance(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = ModerationLogger(bot)
+        self.retention_task.start()
+        self.warning_expiry_task.start()
+
+        # Online backups are specific to the SQLite engine
+        interval = bot.config.get('backup_interval_hours', 24)
+        if interval and hasattr(bot.db, 'backup_to'):
+            self.backup_task.change_interval(hours=interval)
+            self.backup_task.start()
+
+    def cog_unload(self):
+        """Stop background jobs when the cog is unloaded"""
+        self.retention_task.cancel()
+        self.warning_expiry_task.cancel()
+        self.backup_task.cancel()
+
+    @tasks.loop(hours=6)
+    async def retention_task(self):
+        """Move mod_logs rows past each guild's retention threshold into the archive"""
+        for guild_id, days in self.bot.db.guilds_with_setting(RETENTION_SETTING).items():
+            try:
+                moved = await self.archive_guild(guild_id, days)
+                if moved:
+                    logging.info(f"Archived {moved} mod log rows for guild {guild_id}")
+            except Exception as e:
+                logging.error(f"Mod log retention failed for guild {guild_id}: {e}")
+
+    @retention_task.before_loop
+    async def before_retention(self):
+        await self.bot.wait_until_ready()
+
+    @tasks.loop(hours=1)
+    async def warning_expiry_task(self):
+        """Deactivate warnings older than each guild's expiry so they stop counting"""
+        for guild_id, days in self.bot.db.guilds_with_setting(WARNING_EXPIRY_SETTING).items():
+            try:
+                expired = await self.expire_guild_warnings(guild_id, days)
+                if expired:
+                    logging.info(f"Expired {expired} warnings for guild {guild_id}")
+            except Exception as e:
+                logging.error(f"Warning expiry failed for guild {guild_id}: {e}")
+
+    @warning_expiry_task.before_loop
+    async def before_warning_expiry(self):
+        await self.bot.wait_until_ready()
+
+    async def expire_guild_warnings(self, guild_id: int, days: int) -> int:
+        """Expire one guild's old warnings in batches, yielding to other writers between batches"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        total = 0
+
+        while True:
+            expired = await self.bot.db.expire_warnings(guild_id, cutoff, WARNING_EXPIRY_BATCH_SIZE)
+            total += expired
+            if expired < WARNING_EXPIRY_BATCH_SIZE:
+                return total
+            await asyncio.sleep(0.1)
+
+    @tasks.loop(hours=24)
+    async def backup_task(self):
+        """Take a scheduled online backup of the database"""
+        try:
+            await self.run_backup()
+        except Exception as e:
+            logging.error(f"Scheduled database backup failed: {e}")
+
+    @backup_task.before_loop
+    async def before_backup(self):
+        await self.bot.wait_until_ready()
+
+    async def run_backup(self):
+        config = self.bot.config
+        return await create_backup(
+            self.bot.db,
+            directory=config.get('backup_directory', "backups"),
+            generations=config.get('backup_generations', 7),
+            pages_per_step=config.get('backup_pages_per_step', 256)
+        )
+
+    async def archive_guild(self, guild_id: int, days: int) -> int:
+        """Archive one guild's old rows in batches, yielding to other writers between batches"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        total = 0
+
+        while True:
+            moved = await self.bot.db.archive_mod_logs(guild_id, cutoff, RETENTION_BATCH_SIZE)
+            total += moved
+            if moved < RETENTION_BATCH_SIZE:
+                return total
+            await asyncio.sleep(0.1)
+
+    @app_commands.command(name="retention", description="Set how long moderation logs stay in the live table before archiving")
+    @app_commands.describe(days="Archive logs older than this many days (0 to keep everything live)")
+    @has_admin_permissions()
+    async def retention(self, interaction: discord.Interaction, days: int):
+        if days < 0:
+            await interaction.response.send_message("❌ Days cannot be negative.", ephemeral=True)
+            return
+
+        if days and not self.bot.db.archive_path:
+            await interaction.response.send_message("❌ No archive database is configured for this bot. Set `db_archive_path` in config.json to enable archiving.", ephemeral=True)
+            return
+
+        await self.bot.db.set_guild_setting(interaction.guild.id, RETENTION_SETTING, days or None)
+
+        await self.logger.log_action(
+            interaction.guild, "Retention Update", interaction.user,
+            details=f"Mod log retention: {f'{days} days' if days else 'disabled'}",
+            color=0x2F3136
+        )
+
+        embed = await self.logger.create_success_embed(
+            "Retention Updated",
+            f"Moderation logs older than **{days} days** will be moved to the archive. "
+            "Use `/modlogs archived:True` to include them."
+            if days else "Moderation logs will no longer be archived."
+        )
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="warningexpiry", description="Set how long warnings count before they expire")
+    @app_commands.describe(days="Warnings older than this many days stop counting (0 to never expire)")
+    @has_admin_permissions()
+    async def warningexpiry(self, interaction: discord.Interaction, days: app_commands.Range[int, 0, 3650]):
+        await self.bot.db.set_guild_setting(interaction.guild.id, WARNING_EXPIRY_SETTING, days or None)
+
+        await self.logger.log_action(
+            interaction.guild, "Warning Expiry Update", interaction.user,
+            details=f"Warning expiry: {f'{days} days' if days else 'disabled'}",
+            color=0x2F3136
+        )
+
+        embed = await self.logger.create_success_embed(
+            "Warning Expiry Updated",
+            f"Warnings older than **{days} days** will stop counting towards totals and escalation. "
+            "They stay visible in `/warnings`."
+            if days else "Warnings will no longer expire."
+        )
+        await interaction.response.send_message(embed=embed)
+
+    @commands.command(name="backup", hidden=True)
+    @commands.is_owner()
+    async def backup(self, ctx):
+        """Take an online database backup now (owner only)"""
+        if not hasattr(self.bot.db, 'backup_to'):
+            await ctx.send("❌ The configured storage backend does not support backups.")
+            return
+
+        async with ctx.typing():
+            try:
+                paths = await self.run_backup()
+            except Exception as e:
+                logging.error(f"Manual database backup failed: {e}")
+                await ctx.send(f"❌ Backup failed: {e}")
+                return
+
+        sizes = "\n".join(f"`{path}` ({os.path.getsize(path) / 1024:.1f} KB)" for path in paths)
+        await ctx.send(f"✅ Backup complete and verified:\n{sizes}")
+
+    @commands.command(name="backfillstats", hidden=True)
+    @commands.is_owner()
+    async def backfillstats(self, ctx, guild_id: int = None):
+        """Rebuild daily moderation rollups from the raw logs (owner only)"""
+        async with ctx.typing():
+            try:
+                written = await self.bot.db.rebuild_mod_stats(guild_id)
+            except Exception as e:
+                logging.error(f"Moderation stats backfill failed: {e}")
+                await ctx.send(f"❌ Backfill failed: {e}")
+                return
+
+        scope = f"guild {guild_id}" if guild_id else "all guilds"
+        logging.info(f"Rebuilt {written} moderation rollup rows for {scope}")
+        await ctx.send(f"✅ Rebuilt {written} daily rollup rows for {scope}.")
+
+    @commands.command(name="dbstats", hidden=True)
+    @commands.is_owner()
+    async def dbstats(self, ctx, reset: str = None):
+        """Show storage call latencies, slowest first (owner only)"""
+        metrics = getattr(self.bot.db, 'metrics', None)
+        if metrics is None:
+            await ctx.send("❌ Database instrumentation is disabled.")
+            return
+
+        if reset == "reset":
+            metrics.reset()
+            await ctx.send("✅ Database metrics reset.")
+            return
+
+        snapshot = metrics.snapshot()
+        embed = discord.Embed(
+            title="🗄️ Database Metrics",
+            description=(
+                f"Since <t:{int(snapshot['since'])}:R> • "
+                f"{snapshot['slow_queries']} calls over {snapshot['slow_query_ms']}ms"
+            ),
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+
+        methods = sorted(snapshot['methods'].items(), key=lambda item: item[1]['calls'] * item[1]['avg_ms'], reverse=True)
+        for name, stats in methods[:20]:
+            embed.add_field(
+                name=name,
+                value=(
+                    f"{stats['calls']} calls • {stats['rows']} rows\n"
+                    f"avg {stats['avg_ms']:.1f}ms • p95 ≤{stats['p95_ms']:g}ms • max {stats['max_ms']:.1f}ms"
+                ),
+                inline=True
+            )
+
+        if snapshot['maintenance']:
+            embed.add_field(
+                name="Maintenance calls",
+                value="\n".join(
+                    f"{name}: {stats['calls']} calls • avg {stats['avg_ms']:.1f}ms • max {stats['max_ms']:.1f}ms"
+                    for name, stats in snapshot['maintenance'].items()
+                ),
+                inline=False
+            )
+
+        # Only the SQLite engine reports waits on its writer lock, group-commit queue and reader pool
+        if snapshot['queue_wait']:
+            embed.add_field(
+                name="Queue waits",
+                value="\n".join(
+                    f"{kind}: {wait['calls']} waits • avg {wait['avg_ms']:.2f}ms • p95 ≤{wait['p95_ms']:g}ms • max {wait['max_ms']:.1f}ms"
+                    for kind, wait in snapshot['queue_wait'].items()
+                ),
+                inline=False
+            )
+
+        # Only the SQLite engine keeps a settings cache
+        cache_stats = getattr(self.bot.db, 'settings_cache_stats', None)
+        if cache_stats:
+            cache = cache_stats()
+            embed.add_field(
+                name="Guild settings cache",
+                value=f"{cache['hits']} hits • {cache['misses']} misses • {cache['hit_rate']:.1%} hit rate • {cache['size']} guilds",
+                inline=False
+            )
+
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Maintenance(bot))
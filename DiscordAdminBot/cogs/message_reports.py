@@ -79,29 +79,35 @@ class ReportModeration(discord.ui.View):
                 )
                 warning_embed.set_footer(text=f"Server: {interaction.guild.name}")
                 await self.reported_user.send(embed=warning_embed)
-                
-                # Add warning to database if the main bot has warning system
-                try:
-                    bot = interaction.client
-                    if hasattr(bot, 'db'):
-                        await bot.db.add_warning(
-                            interaction.guild.id, 
-                            self.reported_user.id, 
-                            interaction.user.id, 
-                            "Reported message violation"
-                        )
-                except:
-                    pass  # Fallback if warning system not available
-                
             except discord.Forbidden:
                 pass  # User has DMs disabled
             
+            # Add warning to database if the main bot has warning system
+            bot = interaction.client
+            if hasattr(bot, 'db'):
+                await bot.db.add_warning(
+                    interaction.guild.id, 
+                    self.reported_user.id, 
+                    interaction.user.id, 
+                    "Reported message violation"
+                )
+            
             # Send confirmation
             confirmation_embed = await self.create_confirmation_embed(interaction.user, "User Warned")
             await interaction.response.send_message(embed=confirmation_embed)
             
+            # Escalation actions can be slow, so they run after the interaction has been answered
+            member = interaction.guild.get_member(self.reported_user.id)
+            if member and hasattr(bot, 'db') and hasattr(bot, 'escalation'):
+                escalation = await bot.escalation.evaluate(interaction.guild, member, interaction.user)
+                if escalation:
+                    await interaction.followup.send(escalation)
+            
         except Exception as e:
-            await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
+            if interaction.response.is_done():
+                await interaction.followup.send(f"❌ An error occurred: {str(e)}", ephemeral=True)
+            else:
+                await interaction.response.send_message(f"❌ An error occurred: {str(e)}", ephemeral=True)
     
     @discord.ui.button(label="No Action Needed", emoji="✅", style=discord.ButtonStyle.green)
     async def no_action(self, interaction: discord.Interaction, button: discord.ui.Button):
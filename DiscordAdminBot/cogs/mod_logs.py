@@ -0,0 +1,264 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.permissions import has_admin_permissions
+from utils.exporter import export_guild_history
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional
+import logging
+import os
+
+PAGE_SIZE = 10
+SEARCH_MAX_RESULTS = 500
+STATS_DAYS_SHOWN = 14
+
+class ModLogPager(discord.ui.View):
+    """Button-driven pager that fetches one page of mod log rows per click"""
+
+    def __init__(self, author_id: int, title: str,
+                 fetch: Callable[[Any, int], Awaitable[List[Dict[str, Any]]]],
+                 cursor_of: Callable[[Dict[str, Any]], Any] = lambda row: row['id']):
+        super().__init__(timeout=300)
+        self.author_id = author_id
+        self.title = title
+        self.fetch = fetch
+        self.cursor_of = cursor_of
+
+        # Cursor used to fetch each visited page; None is the first page
+        self.cursors: List[Any] = [None]
+        self.page = 0
+        self.has_next = False
+        self.message: Optional[discord.Message] = None
+
+    async def fetch_page(self) -> List[Dict[str, Any]]:
+        """Fetch the current page, plus one extra row to detect a next page"""
+        rows = await self.fetch(self.cursors[self.page], PAGE_SIZE + 1)
+        self.has_next = len(rows) > PAGE_SIZE
+        rows = rows[:PAGE_SIZE]
+
+        if self.has_next and len(self.cursors) == self.page + 1:
+            self.cursors.append(self.cursor_of(rows[-1]))
+
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not self.has_next
+        return rows
+
+    def build_embed(self, rows: List[Dict[str, Any]]) -> discord.Embed:
+        embed = discord.Embed(
+            title=self.title,
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+
+        if not rows:
+            embed.description = "No moderation history matches these filters."
+
+        for row in rows:
+            value = f"**Moderator:** <@{row['moderator_id']}>"
+            if row['target_id']:
+                value += f"\n**Target:** <@{row['target_id']}>"
+            if row['reason']:
+                value += f"\n**Reason:** {row['reason'][:200]}"
+            if row['details']:
+                value += f"\n**Details:** {row['details'][:200]}"
+            if row.get('timestamp_epoch'):
+                value += f"\n**Date:** <t:{row['timestamp_epoch']}:f>"
+            else:
+                value += f"\n**Date:** {str(row['timestamp'])[:19]}"
+
+            name = f"#{row['id']} • {row['action_type']}"
+            if row.get('source') == 'warning':
+                name = f"Warning ID {row['id']}"
+
+            embed.add_field(
+                name=name,
+                value=value,
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {self.page + 1}")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the moderator who ran this command can page through it.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        rows = await self.fetch_page()
+        await interaction.response.edit_message(embed=self.build_embed(rows), view=self)
+
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_next:
+            self.page += 1
+        rows = await self.fetch_page()
+        await interaction.response.edit_message(embed=self.build_embed(rows), view=self)
+
+
+class ModLogs(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="modlogs", description="Browse the moderation log for this server")
+    @app_commands.describe(
+        moderator="Only show actions taken by this moderator",
+        target="Only show actions taken against this user",
+        action="Only show this action type (e.g., Ban, Warning, Mute)",
+        days="Only show actions from the last N days",
+        archived="Include logs that were moved to the archive"
+    )
+    @has_admin_permissions()
+    async def modlogs(self, interaction: discord.Interaction, moderator: discord.Member = None,
+                      target: discord.User = None, action: str = None, days: int = None,
+                      archived: bool = False):
+        if days is not None and days <= 0:
+            await interaction.response.send_message("❌ Days must be a positive number.", ephemeral=True)
+            return
+
+        filters = {
+            'moderator_id': moderator.id if moderator else None,
+            'target_id': target.id if target else None,
+            'action_type': action,
+            'since': datetime.utcnow() - timedelta(days=days) if days else None,
+            'include_archived': archived
+        }
+
+        async def fetch(before_id, limit):
+            return await self.bot.db.get_mod_logs(
+                interaction.guild.id, before_id=before_id, limit=limit, **filters
+            )
+
+        pager = ModLogPager(interaction.user.id, "📜 Moderation Logs", fetch)
+        rows = await pager.fetch_page()
+
+        await interaction.response.send_message(embed=pager.build_embed(rows), view=pager, ephemeral=True)
+        pager.message = await interaction.original_response()
+
+    @app_commands.command(name="searchlogs", description="Search warning and moderation log reasons")
+    @app_commands.describe(
+        query="Words to search for (e.g., scam link)",
+        days="Only search actions from the last N days"
+    )
+    @has_admin_permissions()
+    async def searchlogs(self, interaction: discord.Interaction, query: str, days: int = None):
+        if days is not None and days <= 0:
+            await interaction.response.send_message("❌ Days must be a positive number.", ephemeral=True)
+            return
+
+        since = datetime.utcnow() - timedelta(days=days) if days else None
+
+        # Rank once and page through that ranking, since scores shift as new rows are indexed
+        ranked = await self.bot.db.search_mod_history(
+            interaction.guild.id, query, since=since, limit=SEARCH_MAX_RESULTS
+        )
+        positions = {key: index for index, key in enumerate(ranked)}
+
+        async def fetch(offset, limit):
+            offset = offset or 0
+            return await self.bot.db.get_mod_history_entries(ranked[offset:offset + limit])
+
+        pager = ModLogPager(
+            interaction.user.id, f"🔎 Search: {query[:200]}", fetch,
+            cursor_of=lambda row: positions[(row['source'], row['id'])] + 1
+        )
+        rows = await pager.fetch_page()
+
+        await interaction.response.send_message(embed=pager.build_embed(rows), view=pager, ephemeral=True)
+        pager.message = await interaction.original_response()
+
+    @app_commands.command(name="modstats", description="Show moderation activity per day, moderator and action type")
+    @app_commands.describe(
+        days="Number of days to summarize (default 30, max 365)",
+        moderator="Only count actions taken by this moderator"
+    )
+    @has_admin_permissions()
+    async def modstats(self, interaction: discord.Interaction, days: app_commands.Range[int, 1, 365] = 30,
+                       moderator: discord.Member = None):
+        since = datetime.utcnow() - timedelta(days=days - 1)
+        rows = await self.bot.db.get_mod_stats(
+            interaction.guild.id, since=since, moderator_id=moderator.id if moderator else None
+        )
+
+        by_day, by_moderator, by_action = Counter(), Counter(), Counter()
+        for row in rows:
+            by_day[row['day']] += row['count']
+            by_moderator[row['moderator_id']] += row['count']
+            by_action[row['action_type']] += row['count']
+
+        total = sum(by_day.values())
+        embed = discord.Embed(
+            title="📊 Moderation Statistics",
+            description=f"**{total}** actions in the last **{days}** days"
+            + (f" by {moderator.mention}" if moderator else ""),
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+
+        if total:
+            embed.add_field(
+                name="Top Moderators",
+                value="\n".join(f"<@{user_id}> • {count}" for user_id, count in by_moderator.most_common(10)),
+                inline=True
+            )
+            embed.add_field(
+                name="Actions",
+                value="\n".join(f"{action} • {count}" for action, count in by_action.most_common(10)),
+                inline=True
+            )
+
+            # Most recent days first, scaled to the busiest day
+            recent_days = sorted(by_day, reverse=True)[:STATS_DAYS_SHOWN]
+            busiest = max(by_day[day] for day in recent_days)
+            embed.add_field(
+                name="Daily Activity",
+                value="\n".join(
+                    f"`{datetime.utcfromtimestamp(day * 86400):%b %d}` "
+                    f"{'█' * max(1, round(by_day[day] / busiest * 10))} {by_day[day]}"
+                    for day in recent_days
+                ),
+                inline=False
+            )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="exporthistory", description="Export this server's full moderation history as a compressed file")
+    @app_commands.describe(export_format="File format for the export")
+    @has_admin_permissions()
+    async def exporthistory(self, interaction: discord.Interaction, export_format: Literal["NDJSON", "CSV"] = "NDJSON"):
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            path = await export_guild_history(self.bot.db, interaction.guild.id, export_format.lower())
+        except Exception as e:
+            logging.error(f"Moderation history export failed for {interaction.guild.name}: {e}")
+            await interaction.followup.send(f"❌ Export failed: {e}", ephemeral=True)
+            return
+
+        size = os.path.getsize(path)
+        if size <= interaction.guild.filesize_limit:
+            await interaction.followup.send(
+                f"✅ Moderation history export ({size / 1024:.1f} KB)",
+                file=discord.File(path),
+                ephemeral=True
+            )
+            os.remove(path)
+        else:
+            await interaction.followup.send(
+                f"✅ Export is {size / 1024 / 1024:.1f} MB, too large to attach. Saved on the bot host as `{path}`.",
+                ephemeral=True
+            )
+
+async def setup(bot):
+    await bot.add_cog(ModLogs(bot))
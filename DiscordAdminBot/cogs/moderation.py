@@ -4,7 +4,14 @@ from discord import app_commands
 from datetime import datetime, timedelta
 from utils.permissions import has_admin_permissions, check_bot_permissions, check_hierarchy, convert_duration, format_duration
 from utils.logging_utils import ModerationLogger
+from utils.mute_scheduler import MUTE_BACKEND_SETTING, MAX_TIMEOUT_SECONDS, get_mute_backend
+from utils.mute_roles import FAILED_CHANNELS_SETTING
+from typing import Literal
 import logging
+import time
+
+# Most recent warnings listed by /warnings
+WARNINGS_SHOWN = 10
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
@@ -119,7 +126,8 @@ class Moderation(commands.Cog):
     async def mute(self, interaction: discord.Interaction, user: discord.Member, 
                    duration: str, reason: str = "No reason provided"):
         
-        if not await check_bot_permissions(interaction, "manage_roles"):
+        backend = await get_mute_backend(self.bot, interaction.guild.id)
+        if not await check_bot_permissions(interaction, "moderate_members" if backend == 'timeout' else "manage_roles"):
             return
         
         if not await check_hierarchy(interaction, user):
@@ -131,14 +139,18 @@ class Moderation(commands.Cog):
             await interaction.response.send_message("❌ Invalid duration format. Use formats like: 10m, 1h, 2d", ephemeral=True)
             return
         
+        if backend == 'timeout' and duration_seconds > MAX_TIMEOUT_SECONDS:
+            await interaction.response.send_message("❌ Timeout mutes can last at most 28 days.", ephemeral=True)
+            return
+        
         # Get or create mute role
-        mute_role_id = await self.bot.db.get_mute_role(interaction.guild.id)
         mute_role = None
+        if backend == 'role':
+            mute_role_id = await self.bot.db.get_mute_role(interaction.guild.id)
+            if mute_role_id:
+                mute_role = interaction.guild.get_role(mute_role_id)
         
-        if mute_role_id:
-            mute_role = interaction.guild.get_role(mute_role_id)
-        
-        if not mute_role:
+        if backend == 'role' and not mute_role:
             # Create mute role
             try:
                 mute_role = await interaction.guild.create_role(
@@ -148,30 +160,28 @@ class Moderation(commands.Cog):
                 )
                 await self.bot.db.set_mute_role(interaction.guild.id, mute_role.id)
                 
-                # Set permissions for mute role in all channels
-                for channel in interaction.guild.channels:
-                    try:
-                        if isinstance(channel, discord.TextChannel):
-                            await channel.set_permissions(mute_role, send_messages=False, add_reactions=False)
-                        elif isinstance(channel, discord.VoiceChannel):
-                            await channel.set_permissions(mute_role, speak=False)
-                    except:
-                        continue
+                # Channel overwrites are applied in the background so the mute isn't held up
+                self.bot.mute_provisioner.provision(interaction.guild, mute_role)
                         
             except discord.Forbidden:
                 await interaction.response.send_message("❌ I don't have permission to create roles.", ephemeral=True)
                 return
         
         try:
-            await user.add_roles(mute_role, reason=reason)
-            
-            # Add to database
             duration_delta = timedelta(seconds=duration_seconds)
-            await self.bot.db.add_mute(interaction.guild.id, user.id, interaction.user.id, reason, duration_delta)
+            if backend == 'timeout':
+                await user.timeout(duration_delta, reason=reason)
+            else:
+                await user.add_roles(mute_role, reason=reason)
+            
+            # Add to database, superseding any earlier mute so it can't expire this one after a restart
+            await self.bot.db.remove_mute(interaction.guild.id, user.id)
+            mute_id = await self.bot.db.add_mute(interaction.guild.id, user.id, interaction.user.id, reason, duration_delta)
+            self.bot.mute_scheduler.schedule(interaction.guild.id, user.id, mute_id, time.time() + duration_seconds)
             
             await self.logger.log_action(
                 interaction.guild, "Mute", interaction.user, user, reason,
-                details=f"Duration: {format_duration(duration_seconds)}",
+                details=f"Duration: {format_duration(duration_seconds)}\nBackend: {backend}",
                 color=0xFF8000
             )
             
@@ -190,27 +200,27 @@ class Moderation(commands.Cog):
     @app_commands.describe(user="The user to unmute")
     @has_admin_permissions()
     async def unmute(self, interaction: discord.Interaction, user: discord.Member):
-        if not await check_bot_permissions(interaction, "manage_roles"):
-            return
-        
-        # Get mute role
+        # Undo whichever backend muted the user; the guild may have switched since
         mute_role_id = await self.bot.db.get_mute_role(interaction.guild.id)
-        if not mute_role_id:
-            await interaction.response.send_message("❌ No mute role configured for this server.", ephemeral=True)
-            return
+        mute_role = interaction.guild.get_role(mute_role_id) if mute_role_id else None
+        has_mute_role = mute_role is not None and mute_role in user.roles
+        timed_out = user.is_timed_out()
         
-        mute_role = interaction.guild.get_role(mute_role_id)
-        if not mute_role:
-            await interaction.response.send_message("❌ Mute role not found.", ephemeral=True)
+        if not has_mute_role and not timed_out:
+            await interaction.response.send_message("❌ This user is not muted.", ephemeral=True)
             return
         
-        if mute_role not in user.roles:
-            await interaction.response.send_message("❌ This user is not muted.", ephemeral=True)
+        required = (["manage_roles"] if has_mute_role else []) + (["moderate_members"] if timed_out else [])
+        if not await check_bot_permissions(interaction, *required):
             return
         
         try:
-            await user.remove_roles(mute_role, reason=f"Unmuted by {interaction.user}")
+            if has_mute_role:
+                await user.remove_roles(mute_role, reason=f"Unmuted by {interaction.user}")
+            if timed_out:
+                await user.timeout(None, reason=f"Unmuted by {interaction.user}")
             await self.bot.db.remove_mute(interaction.guild.id, user.id)
+            self.bot.mute_scheduler.cancel(interaction.guild.id, user.id)
             
             await self.logger.log_action(
                 interaction.guild, "Unmute", interaction.user, user,
@@ -228,6 +238,63 @@ class Moderation(commands.Cog):
         except Exception as e:
             await interaction.response.send_message(f"❌ An error occurred: {e}", ephemeral=True)
     
+    @app_commands.command(name="mutesync", description="Re-apply the mute role's channel overwrites in the background")
+    @has_admin_permissions()
+    async def mutesync(self, interaction: discord.Interaction):
+        if not await check_bot_permissions(interaction, "manage_roles", "manage_channels"):
+            return
+        
+        mute_role_id = await self.bot.db.get_mute_role(interaction.guild.id)
+        mute_role = interaction.guild.get_role(mute_role_id) if mute_role_id else None
+        if not mute_role:
+            await interaction.response.send_message("❌ No mute role configured for this server.", ephemeral=True)
+            return
+        
+        if self.bot.mute_provisioner.is_running(interaction.guild.id):
+            await interaction.response.send_message("⏳ Mute role overwrites are already being applied.", ephemeral=True)
+            return
+        
+        failed = await self.bot.db.get_guild_setting(interaction.guild.id, FAILED_CHANNELS_SETTING) or []
+        self.bot.mute_provisioner.provision(interaction.guild, mute_role)
+        
+        embed = await self.logger.create_success_embed(
+            "Mute Role Sync Started",
+            f"Applying {mute_role.mention} overwrites to channels that are missing them."
+            + (f"\n{len(failed)} channels failed last time and will be retried." if failed else "")
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        """Cover new channels with the mute role so role mutes keep working"""
+        if await get_mute_backend(self.bot, channel.guild.id) != 'role':
+            return
+        
+        mute_role_id = await self.bot.db.get_mute_role(channel.guild.id)
+        mute_role = channel.guild.get_role(mute_role_id) if mute_role_id else None
+        if mute_role:
+            await self.bot.mute_provisioner.patch_channel(channel, mute_role)
+    
+    @app_commands.command(name="mutebackend", description="Choose how /mute silences members in this server")
+    @app_commands.describe(backend="role: a Muted role with channel overwrites; timeout: Discord's member timeout (max 28 days)")
+    @has_admin_permissions()
+    async def mutebackend(self, interaction: discord.Interaction, backend: Literal['role', 'timeout']):
+        await self.bot.db.set_guild_setting(interaction.guild.id, MUTE_BACKEND_SETTING, backend)
+        
+        await self.logger.log_action(
+            interaction.guild, "Mute Backend Update", interaction.user,
+            details=f"Mute backend: {backend}",
+            color=0x2F3136
+        )
+        
+        embed = await self.logger.create_success_embed(
+            "Mute Backend Updated",
+            "New mutes will use Discord's member timeout." if backend == 'timeout'
+            else "New mutes will use the mute role."
+        )
+        embed.set_footer(text="Existing mutes keep their backend and still expire normally")
+        await interaction.response.send_message(embed=embed)
+    
     @app_commands.command(name="warn", description="Issue a warning to a user")
     @app_commands.describe(
         user="The user to warn",
@@ -268,12 +335,20 @@ class Moderation(commands.Cog):
             await user.send(embed=dm_embed)
         except:
             pass  # User has DMs disabled
+        
+        # Apply the guild's escalation ladder after the user has been told about the warning
+        escalation = await self.bot.escalation.evaluate(interaction.guild, user, interaction.user)
+        if escalation:
+            await interaction.followup.send(escalation)
     
     @app_commands.command(name="warnings", description="View all warnings for a user")
     @app_commands.describe(user="The user to check warnings for")
     @has_admin_permissions()
     async def warnings(self, interaction: discord.Interaction, user: discord.Member):
-        warnings = await self.bot.db.get_warnings(interaction.guild.id, user.id)
+        # One extra row tells us whether there are older warnings than the ones shown
+        warnings = await self.bot.db.get_warnings(interaction.guild.id, user.id, limit=WARNINGS_SHOWN + 1)
+        has_more = len(warnings) > WARNINGS_SHOWN
+        warnings = warnings[:WARNINGS_SHOWN]
         
         if not warnings:
             embed = discord.Embed(
@@ -284,24 +359,26 @@ class Moderation(commands.Cog):
             await interaction.response.send_message(embed=embed)
             return
         
+        total_warnings = await self.bot.db.get_warning_count(interaction.guild.id, user.id)
+        
         embed = discord.Embed(
             title=f"Warnings for {user}",
-            description=f"Total warnings: {len(warnings)}",
+            description=f"Active warnings: {total_warnings}",
             color=0xFFFF00
         )
         
-        for i, warning in enumerate(warnings[:10], 1):  # Show max 10 warnings
+        for i, warning in enumerate(warnings, 1):
             moderator = interaction.guild.get_member(warning['moderator_id'])
             moderator_name = moderator.display_name if moderator else "Unknown"
             
             embed.add_field(
-                name=f"Warning #{i} (ID: {warning['id']})",
+                name=f"Warning #{i} (ID: {warning['id']}){'' if warning['active'] else ' • expired'}",
                 value=f"**Reason:** {warning['reason']}\n**Moderator:** {moderator_name}\n**Date:** {warning['timestamp'][:19]}",
                 inline=False
             )
         
-        if len(warnings) > 10:
-            embed.set_footer(text=f"Showing 10 of {len(warnings)} warnings")
+        if has_more:
+            embed.set_footer(text=f"Showing the {WARNINGS_SHOWN} most recent warnings")
         
         await interaction.response.send_message(embed=embed)
     
@@ -3,12 +3,117 @@ from discord.ext import commands
 from discord import app_commands
 from utils.permissions import has_admin_permissions, check_bot_permissions, check_hierarchy, convert_duration
 from utils.logging_utils import ModerationLogger
+from utils.bulk_executor import BulkExecutor
+from utils.jobs import Job
 from datetime import datetime
+from typing import List
+import logging
+
+ROLE_JOB_LABELS = {
+    'roleall': {
+        'title': "Mass Role Assignment",
+        'action': "Role Added",
+        'summary': "Mass Role Add",
+        'done': "Added **{role}** to {count} members",
+        'failed': "Failed to add to {count} members",
+        'color': 0x00FF00
+    },
+    'removeroleall': {
+        'title': "Mass Role Removal",
+        'action': "Role Removed",
+        'summary': "Mass Role Remove",
+        'done': "Removed **{role}** from {count} members",
+        'failed': "Failed to remove from {count} members",
+        'color': 0xFF8000
+    }
+}
 
 class ServerManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.logger = ModerationLogger(bot)
+        for job_type in ROLE_JOB_LABELS:
+            bot.jobs.register(job_type, self.run_role_job)
+    
+    @staticmethod
+    def role_job_members(guild: discord.Guild, role: discord.Role, adding: bool, after_id: int = 0) -> List[discord.Member]:
+        """Members a mass role job still has to change, in ID order so the job cursor is a member ID"""
+        if adding:
+            members = [member for member in guild.members if role not in member.roles and not member.bot]
+        else:
+            members = [member for member in guild.members if role in member.roles]
+        return sorted((member for member in members if member.id > after_id), key=lambda member: member.id)
+    
+    async def run_role_job(self, job: Job):
+        """Job handler for roleall and removeroleall, resuming after the last checkpointed member"""
+        guild = self.bot.get_guild(job.guild_id)
+        role = guild.get_role(job.params['role_id'])
+        if role is None:
+            raise ValueError("The role no longer exists")
+        
+        adding = job.job_type == "roleall"
+        labels = ROLE_JOB_LABELS[job.job_type]
+        moderator = guild.get_member(job.created_by) or guild.me
+        members = self.role_job_members(guild, role, adding, after_id=job.cursor or 0)
+        
+        executor = self.create_bulk_executor(
+            (lambda member: member.add_roles(role)) if adding else (lambda member: member.remove_roles(role)),
+            f"{labels['title']}: {role.name} (job #{job.id})"
+        )
+        
+        # Counters from before a restart carry over; audit rows are written as members succeed
+        base_processed, base_succeeded, base_failed = job.processed, job.succeeded, job.failed
+        logged = 0
+        
+        async def checkpoint(result):
+            nonlocal logged
+            new_ids = [member.id for member in result.succeeded[logged:]]
+            logged += len(new_ids)
+            if new_ids:
+                await self.logger.log_bulk_actions(
+                    guild, labels['action'], moderator, new_ids,
+                    details=f"Role: {role.name} ({labels['title'].lower()}, job #{job.id})"
+                )
+            
+            cursor = result.checkpoint_item.id if result.checkpoint_item else job.cursor
+            await job.checkpoint(
+                cursor, base_processed + result.processed,
+                base_succeeded + len(result.succeeded), base_failed + result.failed
+            )
+        
+        result = await executor.run(members, job.progress_message(), job.created_by, job.cancelled, checkpoint)
+        
+        await self.logger.log_action(
+            guild, labels['summary'], moderator,
+            details=(
+                f"Role: {role.name}\nSuccessful: {job.succeeded}\nFailed: {job.failed}"
+                f"\nThroughput: {result.rate:.1f} members/sec\nJob: #{job.id}"
+                + ("\nCancelled" if result.cancelled else "") + ("\nResumed after restart" if job.resumed else "")
+            ),
+            color=labels['color']
+        )
+        
+        # Posted for resumed jobs too, in the channel the job was started from
+        embed = await self.logger.create_success_embed(
+            labels['title'],
+            labels['done'].format(role=role.name, count=job.succeeded) +
+            (f"\n{labels['failed'].format(count=job.failed)}" if job.failed > 0 else "") +
+            (f"\nCancelled after {job.processed} of {job.total} members" if result.cancelled else "") +
+            f"\nThroughput: {result.rate:.1f} members/sec" +
+            (" (since resuming)" if job.resumed else "")
+        )
+        await job.notify(embed)
+    
+    def create_bulk_executor(self, action, title: str) -> BulkExecutor:
+        """Build a bulk executor using the configured concurrency and progress settings"""
+        config = self.bot.config
+        return BulkExecutor(
+            action, title,
+            initial_concurrency=config.get('bulk_initial_concurrency', 2),
+            max_concurrency=config.get('bulk_max_concurrency', 8),
+            progress_interval=config.get('bulk_progress_interval', 5),
+            unit="members"
+        )
     
     @app_commands.command(name="slowmode", description="Set slowmode for a channel")
     @app_commands.describe(
@@ -265,34 +370,17 @@ class ServerManagement(commands.Cog):
         
         await interaction.response.defer()
         
-        members_to_add = [member for member in interaction.guild.members if role not in member.roles and not member.bot]
+        members_to_add = self.role_job_members(interaction.guild, role, adding=True)
         
         if not members_to_add:
             await interaction.followup.send("❌ All members already have this role or there are no members to add it to.")
             return
         
-        success_count = 0
-        failed_count = 0
-        
-        for member in members_to_add:
-            try:
-                await member.add_roles(role)
-                success_count += 1
-            except:
-                failed_count += 1
-        
-        await self.logger.log_action(
-            interaction.guild, "Mass Role Add", interaction.user,
-            details=f"Role: {role.name}\nSuccessful: {success_count}\nFailed: {failed_count}",
-            color=0x00FF00
-        )
-        
-        embed = await self.logger.create_success_embed(
-            "Mass Role Assignment",
-            f"Added **{role.name}** to {success_count} members" + 
-            (f"\nFailed to add to {failed_count} members" if failed_count > 0 else "")
+        job = await self.bot.jobs.submit(
+            interaction.guild.id, "roleall", {'role_id': role.id}, interaction.user.id,
+            total=len(members_to_add), interaction=interaction
         )
-        await interaction.followup.send(embed=embed)
+        logging.info(f"Submitted job {job.id}: add {role.name} to {len(members_to_add)} members in {interaction.guild.name}")
     
     @app_commands.command(name="removeroleall", description="Remove a role from all members in the server")
     @app_commands.describe(role="The role to remove from everyone")
@@ -312,34 +400,17 @@ class ServerManagement(commands.Cog):
         
         await interaction.response.defer()
         
-        members_to_remove = [member for member in interaction.guild.members if role in member.roles]
+        members_to_remove = self.role_job_members(interaction.guild, role, adding=False)
         
         if not members_to_remove:
             await interaction.followup.send("❌ No members have this role.")
             return
         
-        success_count = 0
-        failed_count = 0
-        
-        for member in members_to_remove:
-            try:
-                await member.remove_roles(role)
-                success_count += 1
-            except:
-                failed_count += 1
-        
-        await self.logger.log_action(
-            interaction.guild, "Mass Role Remove", interaction.user,
-            details=f"Role: {role.name}\nSuccessful: {success_count}\nFailed: {failed_count}",
-            color=0xFF8000
-        )
-        
-        embed = await self.logger.create_success_embed(
-            "Mass Role Removal",
-            f"Removed **{role.name}** from {success_count} members" + 
-            (f"\nFailed to remove from {failed_count} members" if failed_count > 0 else "")
+        job = await self.bot.jobs.submit(
+            interaction.guild.id, "removeroleall", {'role_id': role.id}, interaction.user.id,
+            total=len(members_to_remove), interaction=interaction
         )
-        await interaction.followup.send(embed=embed)
+        logging.info(f"Submitted job {job.id}: remove {role.name} from {len(members_to_remove)} members in {interaction.guild.name}")
     
     @app_commands.command(name="lock", description="Lock a channel (disable messaging)")
     @app_commands.describe(channel="The channel to lock")
@@ -0,0 +1,195 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.permissions import has_admin_permissions, check_bot_permissions
+from utils.logging_utils import ModerationLogger
+from utils.bulk_executor import fan_out
+from utils import permission_snapshots
+from datetime import datetime
+from typing import List, Optional
+import logging
+
+FIELD_LIMIT = 1024
+
+def truncate_lines(lines: List[str], limit: int = FIELD_LIMIT) -> str:
+    """Join lines, replacing whatever doesn't fit in an embed field with a count"""
+    kept = []
+    length = 0
+    for index, line in enumerate(lines):
+        if length + len(line) + 1 > limit - 24:
+            kept.append(f"…and {len(lines) - index} more")
+            break
+        kept.append(line)
+        length += len(line) + 1
+    return "\n".join(kept)
+
+class Snapshots(commands.GroupCog, name="snapshot", description="Save and restore every channel overwrite and role permission"):
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = ModerationLogger(bot)
+        super().__init__()
+
+    async def take_snapshot(self, guild: discord.Guild, name: str, created_by: int) -> int:
+        snapshot = permission_snapshots.capture(guild)
+        data = permission_snapshots.encode(snapshot)
+        snapshot_id = await self.bot.db.create_permission_snapshot(
+            guild.id, name, created_by, data, len(snapshot['channels']), len(snapshot['roles'])
+        )
+        logging.info(f"Saved permission snapshot {snapshot_id} for {guild.name} ({len(data)} bytes)")
+        return snapshot_id
+
+    async def load_snapshot(self, interaction: discord.Interaction, snapshot_id: int) -> Optional[dict]:
+        """Fetch and decode a snapshot belonging to this guild, replying with an error if there isn't one"""
+        row = await self.bot.db.get_permission_snapshot(snapshot_id)
+        if not row or row['guild_id'] != interaction.guild.id:
+            await interaction.response.send_message(f"❌ No snapshot #{snapshot_id} found in this server.", ephemeral=True)
+            return None
+        row['snapshot'] = permission_snapshots.decode(row['data'])
+        return row
+
+    @app_commands.command(name="create", description="Save the current channel overwrites and role permissions")
+    @app_commands.describe(name="A label for the snapshot (e.g. before-raid)")
+    @has_admin_permissions()
+    async def create(self, interaction: discord.Interaction, name: str = None):
+        name = (name or datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"))[:100]
+        snapshot_id = await self.take_snapshot(interaction.guild, name, interaction.user.id)
+
+        await self.logger.log_action(
+            interaction.guild, "Permission Snapshot", interaction.user,
+            details=f"Snapshot #{snapshot_id}: {name}",
+            color=0x2F3136
+        )
+
+        embed = await self.logger.create_success_embed(
+            "Snapshot Saved",
+            f"Saved snapshot **#{snapshot_id}** (`{name}`) of {len(interaction.guild.channels)} channels "
+            f"and {len(interaction.guild.roles)} roles.\nUse `/snapshot diff {snapshot_id}` to compare it later."
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="list", description="Show this server's most recent permission snapshots")
+    @has_admin_permissions()
+    async def list_snapshots(self, interaction: discord.Interaction):
+        rows = await self.bot.db.get_permission_snapshots(interaction.guild.id, limit=15)
+
+        lines = [
+            f"**#{row['id']}** `{row['name']}` • <t:{row['created_epoch']}:R> by <@{row['created_by']}> • "
+            f"{row['channel_count']} channels, {row['role_count']} roles ({row['size'] / 1024:.1f} KB)"
+            for row in rows
+        ]
+        embed = discord.Embed(
+            title="📸 Permission Snapshots",
+            description=truncate_lines(lines, 4096) or "No snapshots have been saved in this server.",
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text="Use /snapshot diff to compare one with the live server")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="diff", description="Show what has changed since a snapshot")
+    @app_commands.describe(snapshot_id="The snapshot ID shown in /snapshot list")
+    @has_admin_permissions()
+    async def diff(self, interaction: discord.Interaction, snapshot_id: int):
+        row = await self.load_snapshot(interaction, snapshot_id)
+        if not row:
+            return
+
+        changes = permission_snapshots.diff(row['snapshot'], interaction.guild)
+        embed = discord.Embed(
+            title=f"📸 Changes Since Snapshot #{snapshot_id}",
+            description=f"`{row['name']}` • taken <t:{row['created_epoch']}:R>",
+            color=0x2F3136,
+            timestamp=datetime.utcnow()
+        )
+
+        if changes.edit_count:
+            embed.add_field(
+                name=f"Pending Edits ({changes.edit_count})",
+                value=truncate_lines(changes.describe()),
+                inline=False
+            )
+        else:
+            embed.add_field(name="Pending Edits", value="✅ The server matches this snapshot.", inline=False)
+
+        if changes.missing_channels or changes.missing_roles:
+            embed.add_field(
+                name="Deleted Since Snapshot",
+                value=f"{changes.missing_channels} channels and {changes.missing_roles} roles can't be restored.",
+                inline=False
+            )
+
+        embed.set_footer(text=f"Restoring makes one API call per pending edit • /snapshot restore {snapshot_id}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="restore", description="Restore channel overwrites and role permissions from a snapshot")
+    @app_commands.describe(snapshot_id="The snapshot ID shown in /snapshot list")
+    @has_admin_permissions()
+    async def restore(self, interaction: discord.Interaction, snapshot_id: int):
+        if not await check_bot_permissions(interaction, "manage_channels", "manage_roles"):
+            return
+
+        row = await self.load_snapshot(interaction, snapshot_id)
+        if not row:
+            return
+
+        changes = permission_snapshots.diff(row['snapshot'], interaction.guild)
+        if not changes.edit_count:
+            await interaction.response.send_message(f"✅ The server already matches snapshot #{snapshot_id}.", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+
+        # Keep the state being replaced so the restore itself can be undone
+        backup_id = await self.take_snapshot(interaction.guild, f"before restore of #{snapshot_id}", interaction.user.id)
+
+        reason = f"Restore permission snapshot #{snapshot_id} by {interaction.user}"
+
+        async def apply(edit):
+            target, value = edit
+            if isinstance(target, discord.Role):
+                await target.edit(permissions=value, reason=reason)
+            else:
+                await target.edit(overwrites=value, reason=reason)
+
+        edits = [(role, permissions) for role, permissions in changes.roles]
+        edits += [(channel, overwrites) for channel, overwrites, _ in changes.channels]
+        succeeded, failed, _ = await fan_out(edits, apply, self.bot.config.get('snapshot_restore_concurrency', 10))
+
+        await self.logger.log_action(
+            interaction.guild, "Permission Restore", interaction.user,
+            details=f"Snapshot #{snapshot_id}: {row['name']}\nApplied: {len(succeeded)} edits\nFailed: {len(failed)} edits\nUndo with snapshot #{backup_id}",
+            color=0xFFA500
+        )
+
+        embed = discord.Embed(
+            title="📸 Snapshot Restored" if not failed else "📸 Snapshot Partially Restored",
+            description=f"Restored `{row['name']}` with {len(succeeded)} of {len(edits)} edits.",
+            color=0x00FF00 if not failed else 0xFFFF00,
+            timestamp=datetime.utcnow()
+        )
+
+        if failed:
+            embed.add_field(
+                name=f"❌ Failed ({len(failed)})",
+                value=truncate_lines([f"❌ {target.mention}" for target, _ in failed]),
+                inline=False
+            )
+
+        embed.set_footer(text=f"The previous state was saved as snapshot #{backup_id}")
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="delete", description="Delete a permission snapshot")
+    @app_commands.describe(snapshot_id="The snapshot ID shown in /snapshot list")
+    @has_admin_permissions()
+    async def delete(self, interaction: discord.Interaction, snapshot_id: int):
+        row = await self.bot.db.get_permission_snapshot(snapshot_id)
+        if not row or row['guild_id'] != interaction.guild.id:
+            await interaction.response.send_message(f"❌ No snapshot #{snapshot_id} found in this server.", ephemeral=True)
+            return
+
+        await self.bot.db.delete_permission_snapshot(snapshot_id)
+        embed = await self.logger.create_success_embed("Snapshot Deleted", f"Deleted snapshot #{snapshot_id} (`{row['name']}`).")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Snapshots(bot))
@@ -3,14 +3,36 @@ from discord.ext import commands
 from discord import app_commands
 from utils.permissions import has_admin_permissions, check_bot_permissions
 from utils.logging_utils import ModerationLogger
+from utils.jobs import Job
+from utils.bulk_executor import BulkCancelView, fan_out
 from datetime import datetime
 from typing import Literal, List
+import logging
+
+FIELD_LIMIT = 1024
+
+def format_channel_list(channels: List[discord.abc.GuildChannel], emoji: str) -> str:
+    """One channel mention per line, truncated to fit in an embed field"""
+    lines = []
+    length = 0
+    for index, channel in enumerate(channels):
+        line = f"{emoji} {channel.mention}"
+        if length + len(line) + 1 > FIELD_LIMIT - 24:
+            lines.append(f"…and {len(channels) - index} more")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+def format_channel_names(channels: List[discord.abc.GuildChannel], limit: int = 25) -> str:
+    names = ', '.join(channel.name for channel in channels[:limit])
+    return names + (f" …and {len(channels) - limit} more" if len(channels) > limit else "")
 
 class SpecialCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.logger = ModerationLogger(bot)
-        self.locked_channels = {}  # Store locked channels for masslockdown
+        bot.jobs.register("masslockdown", self.run_lockdown_job)
     
     @app_commands.command(name="echo", description="Make the bot echo a message in plain text or embed format")
     @app_commands.describe(
@@ -101,11 +123,13 @@ class SpecialCommands(commands.Cog):
         success_count = 0
         failed_count = 0
         failed_members = []
+        disconnected_ids = []
         
         for member in members_in_vc:
             try:
                 await member.move_to(None)  # Disconnect from voice
                 success_count += 1
+                disconnected_ids.append(member.id)
             except discord.Forbidden:
                 failed_count += 1
                 failed_members.append(member.display_name)
@@ -114,6 +138,10 @@ class SpecialCommands(commands.Cog):
                 failed_members.append(member.display_name)
         
         # Log the action
+        await self.logger.log_bulk_actions(
+            interaction.guild, "Voice Disconnect", interaction.user, disconnected_ids,
+            details=f"Channel: {vc_channel.name} (voice mass move)"
+        )
         await self.logger.log_action(
             interaction.guild, "Voice Mass Move", interaction.user,
             details=f"Channel: {vc_channel.name}\nDisconnected: {success_count}\nFailed: {failed_count}",
@@ -176,44 +204,112 @@ class SpecialCommands(commands.Cog):
         
         await interaction.response.defer()
         
-        success_channels = []
-        failed_channels = []
-        everyone_role = interaction.guild.default_role
+        job = await self.bot.jobs.submit(
+            interaction.guild.id, "masslockdown", {'channel_ids': [channel.id for channel in channel_list]},
+            interaction.user.id, total=len(channel_list), interaction=interaction
+        )
+        logging.info(f"Submitted job {job.id}: lock {len(channel_list)} channels in {interaction.guild.name}")
+    
+    async def run_lockdown_job(self, job: Job):
+        """Job handler for masslockdown; each batch's snapshots are saved before its channels are touched
+
+        The cursor is {'locked': [...], 'failed': [...]} channel IDs, so a resumed
+        job skips every channel it already finished.
+        """
+        guild = self.bot.get_guild(job.guild_id)
+        everyone_role = guild.default_role
+        moderator = guild.get_member(job.created_by) or guild.me
+        state = job.cursor or {'locked': [], 'failed': []}
+        
+        # A resumed job only retries channels it hadn't finished
+        done = set(state['locked']) | set(state['failed'])
+        channels = []
+        for channel_id in job.params['channel_ids']:
+            if channel_id in done:
+                continue
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                state['failed'].append(channel_id)
+            else:
+                channels.append(channel)
         
-        # Store original permissions for potential unlock
-        guild_id = interaction.guild.id
-        if guild_id not in self.locked_channels:
-            self.locked_channels[guild_id] = {}
+        already_locked = await self.bot.db.get_lockdown_channels(guild.id)
+        concurrency = max(1, self.bot.config.get('lockdown_concurrency', 10))
+        
+        progress = job.progress_message()
+        view = BulkCancelView(job.created_by, job.cancelled) if progress else None
         
-        for channel in channel_list:
+        async def show_progress(status: str, view: discord.ui.View = None):
+            if progress is None:
+                return
+            embed = discord.Embed(title=f"🔒 Mass Lockdown (job #{job.id}) • {status}", color=0x2F3136, timestamp=datetime.utcnow())
+            embed.add_field(name="Progress", value=f"{len(state['locked']) + len(state['failed'])}/{job.total}", inline=True)
+            embed.add_field(name="Locked", value=str(len(state['locked'])), inline=True)
+            embed.add_field(name="Failed", value=str(len(state['failed'])), inline=True)
             try:
-                # Store original permission
-                original_perms = channel.overwrites_for(everyone_role)
-                self.locked_channels[guild_id][channel.id] = {
-                    'original_send_messages': original_perms.send_messages,
-                    'locked_by': interaction.user.id,
-                    'locked_at': datetime.utcnow()
-                }
-                
-                # Lock the channel
-                await channel.set_permissions(everyone_role, send_messages=False)
-                success_channels.append(channel)
-                
-            except discord.Forbidden:
-                failed_channels.append(channel)
-            except Exception:
-                failed_channels.append(channel)
+                await progress.show(embed, view)
+            except discord.HTTPException as e:
+                logging.warning(f"Job {job.id}: progress update failed: {e}")
+        
+        await show_progress("⏳ Running", view)
+        
+        # Lock in batches and checkpoint after each, so a restart only redoes the batch in flight
+        for start in range(0, len(channels), concurrency):
+            if job.cancelled.is_set():
+                break
+            batch = channels[start:start + concurrency]
+            
+            # Store original permissions for /massunlock; existing snapshots are kept
+            await self.bot.db.save_lockdown_channels(
+                guild.id,
+                ((channel.id, channel.overwrites_for(everyone_role).send_messages) for channel in batch),
+                job.created_by
+            )
+            
+            locked, failed, skipped = await fan_out(
+                batch, lambda channel: channel.set_permissions(everyone_role, send_messages=False),
+                concurrency, cancelled=job.cancelled
+            )
+            
+            # Drop the snapshots this run took for channels it never locked
+            await self.bot.db.remove_lockdown_channels(
+                guild.id, [channel.id for channel in failed + skipped if channel.id not in already_locked]
+            )
+            
+            state['locked'] += [channel.id for channel in locked]
+            state['failed'] += [channel.id for channel in failed]
+            await job.checkpoint(state, len(state['locked']) + len(state['failed']), len(state['locked']), len(state['failed']))
+            await show_progress("⏳ Running", view)
+        
+        if view:
+            view.stop()
+        await show_progress("🛑 Cancelled" if job.cancelled.is_set() else "✅ Complete")
+        
+        if not channels:
+            # Only missing channels to record
+            await job.checkpoint(state, len(state['locked']) + len(state['failed']), len(state['locked']), len(state['failed']))
+        
+        success_channels = [guild.get_channel(channel_id) for channel_id in state['locked']]
+        success_channels = [channel for channel in success_channels if channel]
+        failed_channels = [guild.get_channel(channel_id) for channel_id in state['failed']]
+        failed_channels = [channel for channel in failed_channels if channel]
         
         # Log the action
+        await self.bot.db.log_actions_bulk(
+            (guild.id, "Channel Lock", moderator.id, None, None,
+             f"Channel: #{channel.name} ({channel.id}) (mass lockdown)")
+            for channel in success_channels
+        )
         await self.logger.log_action(
-            interaction.guild, "Mass Lockdown", interaction.user,
-            details=f"Locked: {len(success_channels)} channels\nFailed: {len(failed_channels)} channels\nChannels: {', '.join([c.name for c in success_channels])}",
+            guild, "Mass Lockdown", moderator,
+            details=f"Locked: {len(success_channels)} channels\nFailed: {len(state['failed'])} channels\nChannels: {format_channel_names(success_channels)}\nJob: #{job.id}",
             color=0xFF0000
         )
         
-        # Create result embed
+        # Completion notice, posted for resumed jobs too
+        
         embed = discord.Embed(
-            title="🔒 Mass Lockdown Complete",
+            title="🔒 Mass Lockdown Complete" if not job.cancelled.is_set() else "🔒 Mass Lockdown Cancelled",
             color=0xFF0000,
             timestamp=datetime.utcnow()
         )
@@ -221,20 +317,19 @@ class SpecialCommands(commands.Cog):
         if success_channels:
             embed.add_field(
                 name=f"✅ Locked Channels ({len(success_channels)})",
-                value="\n".join([f"🔒 {channel.mention}" for channel in success_channels]),
+                value=format_channel_list(success_channels, "🔒"),
                 inline=False
             )
         
         if failed_channels:
             embed.add_field(
                 name=f"❌ Failed to Lock ({len(failed_channels)})",
-                value="\n".join([f"❌ {channel.mention}" for channel in failed_channels]),
+                value=format_channel_list(failed_channels, "❌"),
                 inline=False
             )
         
-        embed.set_footer(text=f"Use /massunlock to restore permissions")
-        
-        await interaction.followup.send(embed=embed)
+        embed.set_footer(text=f"Job #{job.id} • Use /massunlock to restore permissions")
+        await job.notify(embed)
     
     @app_commands.command(name="massunlock", description="Unlock channels that were locked with masslockdown")
     @app_commands.describe(channels="Channels to unlock (leave empty to unlock all previously locked channels)")
@@ -244,8 +339,9 @@ class SpecialCommands(commands.Cog):
             return
         
         guild_id = interaction.guild.id
+        locked_channels = await self.bot.db.get_lockdown_channels(guild_id)
         
-        if guild_id not in self.locked_channels or not self.locked_channels[guild_id]:
+        if not locked_channels:
             await interaction.response.send_message("❌ No channels were previously locked with mass lockdown.", ephemeral=True)
             return
         
@@ -263,7 +359,7 @@ class SpecialCommands(commands.Cog):
                     channel = interaction.guild.get_channel(channel_id)
                     
                     if channel and isinstance(channel, discord.TextChannel):
-                        if channel_id in self.locked_channels[guild_id]:
+                        if channel_id in locked_channels:
                             channel_list.append(channel)
                         else:
                             await interaction.response.send_message(f"❌ {channel.mention} was not locked with mass lockdown.", ephemeral=True)
@@ -275,11 +371,15 @@ class SpecialCommands(commands.Cog):
                     await interaction.response.send_message(f"❌ Invalid channel format: {channel_part}", ephemeral=True)
                     return
         else:
-            # Unlock all previously locked channels
-            for channel_id in list(self.locked_channels[guild_id].keys()):
+            # Unlock all previously locked channels; forget ones that were deleted
+            missing = []
+            for channel_id in locked_channels:
                 channel = interaction.guild.get_channel(channel_id)
                 if channel and isinstance(channel, discord.TextChannel):
                     channel_list.append(channel)
+                else:
+                    missing.append(channel_id)
+            await self.bot.db.remove_lockdown_channels(guild_id, missing)
         
         if not channel_list:
             await interaction.response.send_message("❌ No valid channels to unlock.", ephemeral=True)
@@ -287,31 +387,28 @@ class SpecialCommands(commands.Cog):
         
         await interaction.response.defer()
         
-        success_channels = []
-        failed_channels = []
         everyone_role = interaction.guild.default_role
         
-        for channel in channel_list:
-            try:
-                # Restore original permissions
-                channel_data = self.locked_channels[guild_id][channel.id]
-                original_send_messages = channel_data['original_send_messages']
-                
-                await channel.set_permissions(everyone_role, send_messages=original_send_messages)
-                success_channels.append(channel)
-                
-                # Remove from locked channels
-                del self.locked_channels[guild_id][channel.id]
-                
-            except discord.Forbidden:
-                failed_channels.append(channel)
-            except Exception:
-                failed_channels.append(channel)
+        async def restore(channel):
+            # Restore the original send_messages value, dropping the overwrite if nothing else is set
+            overwrite = channel.overwrites_for(everyone_role)
+            overwrite.send_messages = locked_channels[channel.id]['original_send_messages']
+            await channel.set_permissions(everyone_role, overwrite=None if overwrite.is_empty() else overwrite)
+        
+        success_channels, failed_channels, _ = await fan_out(
+            channel_list, restore, self.bot.config.get('lockdown_concurrency', 10)
+        )
+        await self.bot.db.remove_lockdown_channels(guild_id, [channel.id for channel in success_channels])
         
         # Log the action
+        await self.bot.db.log_actions_bulk(
+            (interaction.guild.id, "Channel Unlock", interaction.user.id, None, None,
+             f"Channel: #{channel.name} ({channel.id}) (mass unlock)")
+            for channel in success_channels
+        )
         await self.logger.log_action(
             interaction.guild, "Mass Unlock", interaction.user,
-            details=f"Unlocked: {len(success_channels)} channels\nFailed: {len(failed_channels)} channels\nChannels: {', '.join([c.name for c in success_channels])}",
+            details=f"Unlocked: {len(success_channels)} channels\nFailed: {len(failed_channels)} channels\nChannels: {format_channel_names(success_channels)}",
             color=0x00FF00
         )
         
@@ -325,14 +422,14 @@ class SpecialCommands(commands.Cog):
         if success_channels:
             embed.add_field(
                 name=f"✅ Unlocked Channels ({len(success_channels)})",
-                value="\n".join([f"🔓 {channel.mention}" for channel in success_channels]),
+                value=format_channel_list(success_channels, "🔓"),
                 inline=False
             )
         
         if failed_channels:
             embed.add_field(
                 name=f"❌ Failed to Unlock ({len(failed_channels)})",
-                value="\n".join([f"❌ {channel.mention}" for channel in failed_channels]),
+                value=format_channel_list(failed_channels, "❌"),
                 inline=False
             )
         
@@ -1,101 +1,428 @@
 import aiosqlite
 import asyncio
+import json
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+import sqlite3
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Optional, Any, AsyncIterator, Awaitable, Callable, Iterable, Tuple
+from migrations import MIGRATIONS, SCHEMA_VERSION, ARCHIVE_SCHEMA
+
+WriteOperation = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+MUTE_COLUMNS = "id, guild_id, user_id, moderator_id, reason, start_time, end_time, active, start_epoch, end_epoch"
+MOD_LOG_COLUMNS = "id, guild_id, action_type, moderator_id, target_id, reason, details, timestamp, timestamp_epoch"
+WARNING_COLUMNS = "id, guild_id, user_id, moderator_id, reason, timestamp, timestamp_epoch, active"
+JOB_COLUMNS = ("id, guild_id, job_type, params, cursor, status, total, processed, succeeded, failed, "
+               "created_by, created_epoch, updated_epoch, error, channel_id, message_id")
+SNAPSHOT_COLUMNS = "id, guild_id, name, created_by, created_epoch, channel_count, role_count, length(data)"
+
+# Job statuses that should be picked up again after a restart
+RESUMABLE_JOB_STATUSES = ('pending', 'running')
+
+# Tables that make up a guild's moderation history, in export order
+HISTORY_TABLES = {
+    'warnings': WARNING_COLUMNS,
+    'mutes': MUTE_COLUMNS,
+    'mod_logs': MOD_LOG_COLUMNS,
+    'archive.mod_logs': MOD_LOG_COLUMNS
+}
+
+# Adds count to one (guild_id, day, moderator_id, action_type) rollup row
+ROLLUP_UPSERT = (
+    "INSERT INTO mod_action_daily (guild_id, day, moderator_id, action_type, count) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (guild_id, day, moderator_id, action_type) DO UPDATE SET count = count + excluded.count"
+)
+
+class BackupRestarted(Exception):
+    """Raised when concurrent writes keep restarting an incremental backup"""
+
+def to_epoch(value: datetime) -> int:
+    """Convert a datetime to epoch seconds, treating naive values as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def utc_text(epoch: int) -> str:
+    """Format epoch seconds like SQLite's CURRENT_TIMESTAMP"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
 
 class Database:
-    def __init__(self, db_path: str = "admin_bot.db"):
+    def __init__(self, db_path: str = "admin_bot.db", group_commit: bool = False,
+                 commit_interval_ms: int = 50, commit_max_batch: int = 100,
+                 wal_mode: bool = False, reader_pool_size: int = 0,
+                 archive_path: str = None):
         self.db_path = db_path
         self.db = None
+        
+        # Optional cold-storage database attached as "archive" for old mod_logs rows
+        self.archive_path = archive_path if db_path != ":memory:" else None
+        
+        # WAL settings: reads are spread over a pool of read-only connections
+        # while all writes go through the single writer connection (self.db)
+        self.wal_mode = wal_mode and db_path != ":memory:"
+        self.reader_pool_size = reader_pool_size if self.wal_mode else 0
+        self._readers = None
+        self._reader_connections = []
+        
+        # Write-through cache of guild_settings rows keyed by guild ID
+        self._settings_cache: Dict[int, Dict[str, Any]] = {}
+        self.settings_cache_hits = 0
+        self.settings_cache_misses = 0
+        
+        # Group-commit settings: when enabled, writes are queued and committed
+        # together every commit_interval_ms or commit_max_batch operations
+        self.group_commit = group_commit
+        self.commit_interval = commit_interval_ms / 1000
+        self.commit_max_batch = max(1, commit_max_batch)
+        self._write_lock = asyncio.Lock()
+        self._write_queue = None
+        self._flush_task = None
+        
+        # Called with (kind, elapsed_ms) for time spent waiting on the writer lock,
+        # the group-commit queue or the reader pool; set by InstrumentedStorage
+        self.wait_observer: Optional[Callable[[str, float], None]] = None
     
     async def initialize(self):
-        """Initialize database and create tables"""
+        """Initialize database and apply schema migrations"""
         self.db = await aiosqlite.connect(self.db_path)
-        await self.create_tables()
+        
+        if self.wal_mode:
+            await self.db.execute("PRAGMA journal_mode=WAL")
+            await self.db.execute("PRAGMA synchronous=NORMAL")
+        
+        await self.run_migrations()
+        
+        if self.archive_path:
+            await self._attach_archive()
+        
+        if self.reader_pool_size > 0:
+            await self._open_readers()
+        
+        await self.load_guild_settings()
+        
+        if self.group_commit:
+            self._write_queue = asyncio.Queue()
+            self._flush_task = asyncio.create_task(self._flush_writes())
+        
         logging.info("Database initialized successfully")
     
-    async def create_tables(self):
-        """Create all necessary database tables"""
-        tables = [
-            # Warnings table
-            """
-            CREATE TABLE IF NOT EXISTS warnings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                moderator_id INTEGER NOT NULL,
-                reason TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-            """,
-            
-            # Mutes table
-            """
-            CREATE TABLE IF NOT EXISTS mutes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                moderator_id INTEGER NOT NULL,
-                reason TEXT,
-                start_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-                end_time DATETIME,
-                active BOOLEAN DEFAULT 1
-            )
-            """,
+    async def run_migrations(self):
+        """Apply pending schema migrations tracked by PRAGMA user_version"""
+        cursor = await self.db.execute("PRAGMA user_version")
+        row = await cursor.fetchone()
+        current_version = row[0] if row else 0
+        
+        if current_version >= SCHEMA_VERSION:
+            return
+        
+        for version, description, statements in MIGRATIONS:
+            if version <= current_version:
+                continue
             
-            # Moderation logs table
-            """
-            CREATE TABLE IF NOT EXISTS mod_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER NOT NULL,
-                action_type TEXT NOT NULL,
-                moderator_id INTEGER NOT NULL,
-                target_id INTEGER,
-                reason TEXT,
-                details TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-            """,
+            try:
+                await self.db.execute("BEGIN")
+                for statement in statements:
+                    await self.db.execute(statement)
+                await self.db.execute(f"PRAGMA user_version = {version}")
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                logging.error(f"Database migration {version} ({description}) failed")
+                raise
             
-            # Guild settings table
-            """
-            CREATE TABLE IF NOT EXISTS guild_settings (
-                guild_id INTEGER PRIMARY KEY,
-                mod_log_channel INTEGER,
-                mute_role_id INTEGER,
-                settings_json TEXT DEFAULT '{}'
-            )
-            """
-        ]
-        
-        for table_sql in tables:
-            await self.db.execute(table_sql)
+            logging.info(f"Applied database migration {version}: {description}")
+    
+    async def _attach_archive(self):
+        """Attach the archive database to the writer and create its schema"""
+        await self.db.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        if self.wal_mode:
+            await self.db.execute("PRAGMA archive.journal_mode=WAL")
         
+        for statement in ARCHIVE_SCHEMA:
+            await self.db.execute(statement)
         await self.db.commit()
+        
+        logging.info(f"Attached mod log archive database {self.archive_path}")
+    
+    @property
+    def history_tables(self) -> List[str]:
+        """Tables that make up a guild's moderation history, including the archive if attached"""
+        return [table for table in HISTORY_TABLES if self.archive_path or not table.startswith('archive.')]
     
     async def close(self):
-        """Close database connection"""
+        """Flush queued writes and close database connection"""
+        if self._flush_task:
+            await self._write_queue.put(None)
+            await self._flush_task
+            self._flush_task = None
+        
+        for reader in self._reader_connections:
+            await reader.close()
+        self._reader_connections = []
+        self._readers = None
+        
         if self.db:
             await self.db.close()
     
+    async def ping(self):
+        """Run a trivial query on the writer connection"""
+        await self.db.execute("SELECT 1")
+    
+    # Backup methods
+    async def backup_to(self, dest_path: str, pages_per_step: int = 256, step_delay: float = 0.05,
+                        source_path: str = None) -> str:
+        """Copy the live database to dest_path with SQLite's online backup API
+        
+        Runs on its own connection in a worker thread, copying pages_per_step pages
+        at a time and sleeping step_delay between steps so the source lock is
+        released and regular queries keep flowing. If concurrent writes keep
+        restarting the incremental copy, it falls back to a single-step copy.
+        Returns the result of PRAGMA integrity_check on the copy.
+        """
+        source_path = source_path or self.db_path
+        
+        def run_backup():
+            source = sqlite3.connect(source_path)
+            try:
+                restarts = 0
+                previous_remaining = None
+                
+                def progress(status, remaining, total):
+                    nonlocal restarts, previous_remaining
+                    if previous_remaining is not None and remaining > previous_remaining:
+                        restarts += 1
+                        if restarts > 3:
+                            raise BackupRestarted()
+                    previous_remaining = remaining
+                    time.sleep(step_delay)
+                
+                dest = sqlite3.connect(dest_path)
+                try:
+                    try:
+                        source.backup(dest, pages=pages_per_step, progress=progress)
+                    except BackupRestarted:
+                        logging.warning("Incremental backup kept restarting; copying in one step")
+                        source.backup(dest, pages=-1)
+                    
+                    return dest.execute("PRAGMA integrity_check").fetchone()[0]
+                finally:
+                    dest.close()
+            finally:
+                source.close()
+        
+        return await asyncio.to_thread(run_backup)
+    
+    # Read path
+    async def _open_readers(self):
+        """Open the pool of read-only connections used in WAL mode"""
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        self._readers = asyncio.Queue()
+        
+        for _ in range(self.reader_pool_size):
+            reader = await aiosqlite.connect(uri, uri=True)
+            if self.archive_path:
+                archive_uri = Path(self.archive_path).resolve().as_uri() + "?mode=ro"
+                await reader.execute("ATTACH DATABASE ? AS archive", (archive_uri,))
+            self._reader_connections.append(reader)
+            self._readers.put_nowait(reader)
+        
+        logging.info(f"Opened {self.reader_pool_size} read-only database connections")
+    
+    async def _fetchall(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        """Run a read query on a pooled connection and fetch all rows"""
+        async with self._reader() as db:
+            cursor = await db.execute(sql, parameters)
+            return await cursor.fetchall()
+    
+    async def _fetchone(self, sql: str, parameters: tuple = ()) -> Optional[tuple]:
+        """Run a read query on a pooled connection and fetch one row"""
+        async with self._reader() as db:
+            cursor = await db.execute(sql, parameters)
+            return await cursor.fetchone()
+    
+    def _record_wait(self, kind: str, started: float):
+        """Report time waited since started (a perf_counter value) to the wait observer"""
+        if self.wait_observer is not None:
+            self.wait_observer(kind, (time.perf_counter() - started) * 1000)
+    
+    @asynccontextmanager
+    async def _reader(self):
+        """Borrow a read connection, falling back to the writer when no pool is configured
+        
+        The writer fallback holds the write lock so a read never sees rows from a
+        write or group-commit batch that hasn't committed yet (or gets rolled back).
+        """
+        if self._readers is None:
+            started = time.perf_counter()
+            async with self._write_lock:
+                self._record_wait('write_lock', started)
+                yield self.db
+            return
+        
+        started = time.perf_counter()
+        reader = await self._readers.get()
+        self._record_wait('reader_pool', started)
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+    
+    # Write path
+    async def _write(self, operation: WriteOperation) -> Any:
+        """Run a write operation in its own transaction or through the group-commit queue"""
+        if self._flush_task is None:
+            started = time.perf_counter()
+            async with self._write_lock:
+                self._record_wait('write_lock', started)
+                try:
+                    result = await operation(self.db)
+                    await self.db.commit()
+                except Exception:
+                    await self.db.rollback()
+                    raise
+            return result
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((operation, future, time.perf_counter()))
+        return await future
+    
+    async def _execute_write(self, sql: str, parameters: tuple = ()) -> aiosqlite.Cursor:
+        """Run a single write statement and return its cursor once committed"""
+        async def operation(db):
+            return await db.execute(sql, parameters)
+        
+        return await self._write(operation)
+    
+    @staticmethod
+    async def _insert_many(db: aiosqlite.Connection, sql: str, rows: List[tuple]) -> range:
+        """Insert rows with executemany and return the range of new row IDs"""
+        if not rows:
+            return range(0)
+        
+        await db.executemany(sql, rows)
+        cursor = await db.execute("SELECT last_insert_rowid()")
+        last_id = (await cursor.fetchone())[0]
+        
+        # AUTOINCREMENT IDs handed out inside one write transaction are contiguous
+        return range(last_id - len(rows) + 1, last_id + 1)
+    
+    async def _flush_writes(self):
+        """Background task that commits queued writes in groups"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            item = await self._write_queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            deadline = loop.time() + self.commit_interval
+            
+            while len(batch) < self.commit_max_batch:
+                timeout = deadline - loop.time()
+                try:
+                    if timeout > 0:
+                        item = await asyncio.wait_for(self._write_queue.get(), timeout)
+                    else:
+                        item = self._write_queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._commit_batch(batch)
+    
+    async def _commit_batch(self, batch: List[tuple]):
+        """Commit a batch of queued writes in one transaction, isolating failures with savepoints"""
+        outcomes = []
+        
+        async with self._write_lock:
+            try:
+                await self.db.execute("BEGIN")
+                for operation, future, queued in batch:
+                    self._record_wait('group_commit', queued)
+                    await self.db.execute("SAVEPOINT group_write")
+                    try:
+                        result = await operation(self.db)
+                    except Exception as e:
+                        await self.db.execute("ROLLBACK TO group_write")
+                        await self.db.execute("RELEASE group_write")
+                        outcomes.append((future, None, e))
+                    else:
+                        await self.db.execute("RELEASE group_write")
+                        outcomes.append((future, result, None))
+                await self.db.commit()
+            except Exception as e:
+                logging.error(f"Group commit of {len(batch)} writes failed: {e}")
+                await self.db.rollback()
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        
+        # Results are only handed back once the transaction is durable
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
     # Warning system methods
     async def add_warning(self, guild_id: int, user_id: int, moderator_id: int, reason: str) -> int:
         """Add a warning to the database"""
-        cursor = await self.db.execute(
-            "INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
-            (guild_id, user_id, moderator_id, reason)
-        )
-        await self.db.commit()
-        return cursor.lastrowid
+        async def operation(db):
+            cursor = await db.execute(
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp_epoch) VALUES (?, ?, ?, ?, ?)",
+                (guild_id, user_id, moderator_id, reason, int(time.time()))
+            )
+            await db.execute(
+                "INSERT INTO warning_counts (guild_id, user_id, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (guild_id, user_id) DO UPDATE SET count = count + 1",
+                (guild_id, user_id)
+            )
+            return cursor.lastrowid
+        
+        return await self._write(operation)
     
-    async def get_warnings(self, guild_id: int, user_id: int) -> List[Dict[str, Any]]:
-        """Get all warnings for a user"""
-        cursor = await self.db.execute(
-            "SELECT * FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY timestamp DESC",
-            (guild_id, user_id)
-        )
-        rows = await cursor.fetchall()
+    async def add_warnings_bulk(self, warnings: Iterable[Tuple[int, int, int, str]]) -> range:
+        """Add (guild_id, user_id, moderator_id, reason) warnings in one transaction"""
+        now = int(time.time())
+        rows = [tuple(warning) + (now,) for warning in warnings]
+        
+        async def operation(db):
+            ids = await self._insert_many(
+                db,
+                "INSERT INTO warnings (guild_id, user_id, moderator_id, reason, timestamp_epoch) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            await db.executemany(
+                "INSERT INTO warning_counts (guild_id, user_id, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (guild_id, user_id) DO UPDATE SET count = count + 1",
+                [(row[0], row[1]) for row in rows]
+            )
+            return ids
+        
+        return await self._write(operation)
+    
+    async def get_warnings(self, guild_id: int, user_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        """Get warnings for a user, newest first, optionally limited to the most recent ones"""
+        sql = f"SELECT {WARNING_COLUMNS} FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY id DESC"
+        parameters = (guild_id, user_id)
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters += (limit,)
+        
+        rows = await self._fetchall(sql, parameters)
         
         warnings = []
         for row in rows:
@@ -105,143 +432,782 @@ class Database:
                 'user_id': row[2],
                 'moderator_id': row[3],
                 'reason': row[4],
-                'timestamp': row[5]
+                'timestamp': row[5],
+                'timestamp_epoch': row[6],
+                'active': row[7]
             })
         
         return warnings
     
     async def clear_warnings(self, guild_id: int, user_id: int) -> int:
         """Clear all warnings for a user"""
-        cursor = await self.db.execute(
-            "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?",
-            (guild_id, user_id)
-        )
-        await self.db.commit()
-        return cursor.rowcount
+        async def operation(db):
+            cursor = await db.execute(
+                "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            await db.execute(
+                "DELETE FROM warning_counts WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            return cursor.rowcount
+        
+        return await self._write(operation)
     
     async def get_warning_count(self, guild_id: int, user_id: int) -> int:
-        """Get warning count for a user"""
-        cursor = await self.db.execute(
-            "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ?",
+        """Get active warning count for a user"""
+        result = await self._fetchone(
+            "SELECT count FROM warning_counts WHERE guild_id = ? AND user_id = ?",
             (guild_id, user_id)
         )
-        result = await cursor.fetchone()
         return result[0] if result else 0
     
+    async def count_warnings_since(self, guild_id: int, user_id: int, since: datetime) -> int:
+        """Count a user's active warnings issued at or after since, using the (guild, user, active, time) index"""
+        result = await self._fetchone(
+            "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ? AND active = 1 AND timestamp_epoch >= ?",
+            (guild_id, user_id, to_epoch(since))
+        )
+        return result[0]
+    
+    async def expire_warnings(self, guild_id: int, older_than: datetime, batch_size: int = 1000) -> int:
+        """Deactivate up to batch_size of a guild's active warnings issued before older_than
+        
+        The matching warning_counts rows are decremented in the same transaction.
+        Returns how many warnings were expired; callers loop until it is below
+        batch_size so other writers get a turn between batches.
+        """
+        cutoff = to_epoch(older_than)
+        
+        async def operation(db):
+            async with db.execute(
+                "SELECT id, user_id FROM warnings WHERE guild_id = ? AND active = 1 AND timestamp_epoch < ? "
+                "ORDER BY timestamp_epoch LIMIT ?",
+                (guild_id, cutoff, batch_size)
+            ) as cursor:
+                rows = await cursor.fetchall()
+            if not rows:
+                return 0
+            
+            await db.executemany("UPDATE warnings SET active = 0 WHERE id = ?", [(row[0],) for row in rows])
+            per_user = Counter(row[1] for row in rows)
+            await db.executemany(
+                "UPDATE warning_counts SET count = MAX(count - ?, 0) WHERE guild_id = ? AND user_id = ?",
+                [(count, guild_id, user_id) for user_id, count in per_user.items()]
+            )
+            await db.executemany(
+                "DELETE FROM warning_counts WHERE guild_id = ? AND user_id = ? AND count = 0",
+                [(guild_id, user_id) for user_id in per_user]
+            )
+            return len(rows)
+        
+        return await self._write(operation)
+    
     # Mute system methods
     async def add_mute(self, guild_id: int, user_id: int, moderator_id: int, reason: str, duration: timedelta = None) -> int:
         """Add a mute to the database"""
-        end_time = datetime.now() + duration if duration else None
-        
-        cursor = await self.db.execute(
-            "INSERT INTO mutes (guild_id, user_id, moderator_id, reason, end_time) VALUES (?, ?, ?, ?, ?)",
-            (guild_id, user_id, moderator_id, reason, end_time)
+        cursor = await self._execute_write(
+            "INSERT INTO mutes (guild_id, user_id, moderator_id, reason, start_time, end_time, start_epoch, end_epoch) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self._mute_row(guild_id, user_id, moderator_id, reason, duration, int(time.time()))
         )
-        await self.db.commit()
         return cursor.lastrowid
     
+    async def add_mutes_bulk(self, mutes: Iterable[Tuple[int, int, int, str, Optional[timedelta]]]) -> range:
+        """Add (guild_id, user_id, moderator_id, reason, duration) mutes in one transaction"""
+        now = int(time.time())
+        rows = [self._mute_row(*mute, now) for mute in mutes]
+        
+        async def operation(db):
+            return await self._insert_many(
+                db,
+                "INSERT INTO mutes (guild_id, user_id, moderator_id, reason, start_time, end_time, start_epoch, end_epoch) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        
+        return await self._write(operation)
+    
+    @staticmethod
+    def _mute_row(guild_id: int, user_id: int, moderator_id: int, reason: str,
+                  duration: Optional[timedelta], now: int) -> tuple:
+        end_epoch = now + int(duration.total_seconds()) if duration else None
+        return (
+            guild_id, user_id, moderator_id, reason,
+            utc_text(now), utc_text(end_epoch) if end_epoch else None,
+            now, end_epoch
+        )
+    
     async def remove_mute(self, guild_id: int, user_id: int) -> bool:
         """Remove active mute for a user"""
-        cursor = await self.db.execute(
+        cursor = await self._execute_write(
             "UPDATE mutes SET active = 0 WHERE guild_id = ? AND user_id = ? AND active = 1",
             (guild_id, user_id)
         )
-        await self.db.commit()
         return cursor.rowcount > 0
     
+    async def remove_mutes(self, mute_ids: Iterable[int]) -> int:
+        """Deactivate a batch of mutes by ID in a single transaction"""
+        parameters = [(mute_id,) for mute_id in mute_ids]
+        if not parameters:
+            return 0
+        
+        async def operation(db):
+            cursor = await db.executemany(
+                "UPDATE mutes SET active = 0 WHERE id = ? AND active = 1",
+                parameters
+            )
+            return cursor.rowcount
+        
+        return await self._write(operation)
+    
     async def get_active_mute(self, guild_id: int, user_id: int) -> Optional[Dict[str, Any]]:
         """Get active mute for a user"""
-        cursor = await self.db.execute(
-            "SELECT * FROM mutes WHERE guild_id = ? AND user_id = ? AND active = 1 ORDER BY start_time DESC LIMIT 1",
+        row = await self._fetchone(
+            f"SELECT {MUTE_COLUMNS} FROM mutes WHERE guild_id = ? AND user_id = ? AND active = 1 ORDER BY id DESC LIMIT 1",
             (guild_id, user_id)
         )
-        row = await cursor.fetchone()
         
         if row:
-            return {
-                'id': row[0],
-                'guild_id': row[1],
-                'user_id': row[2],
-                'moderator_id': row[3],
-                'reason': row[4],
-                'start_time': row[5],
-                'end_time': row[6],
-                'active': row[7]
-            }
+            return self._mute_from_row(row)
         return None
     
     async def get_expired_mutes(self) -> List[Dict[str, Any]]:
         """Get all expired mutes that are still active"""
-        cursor = await self.db.execute(
-            "SELECT * FROM mutes WHERE active = 1 AND end_time IS NOT NULL AND end_time <= datetime('now')"
+        rows = await self._fetchall(
+            f"SELECT {MUTE_COLUMNS} FROM mutes WHERE active = 1 AND end_epoch IS NOT NULL AND end_epoch <= ?",
+            (int(time.time()),)
         )
-        rows = await cursor.fetchall()
         
-        mutes = []
-        for row in rows:
-            mutes.append({
-                'id': row[0],
-                'guild_id': row[1],
-                'user_id': row[2],
-                'moderator_id': row[3],
-                'reason': row[4],
-                'start_time': row[5],
-                'end_time': row[6],
-                'active': row[7]
-            })
+        return [self._mute_from_row(row) for row in rows]
+    
+    async def get_pending_mutes(self) -> List[Dict[str, Any]]:
+        """Get all active mutes that have an end time"""
+        rows = await self._fetchall(
+            "SELECT id, guild_id, user_id, end_epoch FROM mutes WHERE active = 1 AND end_epoch IS NOT NULL"
+        )
         
-        return mutes
+        return [
+            {'id': row[0], 'guild_id': row[1], 'user_id': row[2], 'end_epoch': row[3]}
+            for row in rows
+        ]
+    
+    @staticmethod
+    def _mute_from_row(row: tuple) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'guild_id': row[1],
+            'user_id': row[2],
+            'moderator_id': row[3],
+            'reason': row[4],
+            'start_time': row[5],
+            'end_time': row[6],
+            'active': row[7],
+            'start_epoch': row[8],
+            'end_epoch': row[9]
+        }
     
     # Moderation logs methods
     async def log_action(self, guild_id: int, action_type: str, moderator_id: int, target_id: int = None, reason: str = None, details: str = None):
         """Log a moderation action"""
-        await self.db.execute(
-            "INSERT INTO mod_logs (guild_id, action_type, moderator_id, target_id, reason, details) VALUES (?, ?, ?, ?, ?, ?)",
-            (guild_id, action_type, moderator_id, target_id, reason, details)
+        now = int(time.time())
+        
+        async def operation(db):
+            await db.execute(
+                "INSERT INTO mod_logs (guild_id, action_type, moderator_id, target_id, reason, details, timestamp_epoch) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, action_type, moderator_id, target_id, reason, details, now)
+            )
+            await db.execute(ROLLUP_UPSERT, (guild_id, now // 86400, moderator_id, action_type, 1))
+        
+        await self._write(operation)
+    
+    async def log_actions_bulk(self, actions: Iterable[Tuple[int, str, int, Optional[int], Optional[str], Optional[str]]]) -> range:
+        """Log (guild_id, action_type, moderator_id, target_id, reason, details) actions in one transaction"""
+        now = int(time.time())
+        rows = [tuple(action) + (now,) for action in actions]
+        
+        # Pre-aggregate so each rollup row is upserted once per batch
+        rollups = Counter((row[0], now // 86400, row[2], row[1]) for row in rows)
+        
+        async def operation(db):
+            ids = await self._insert_many(
+                db,
+                "INSERT INTO mod_logs (guild_id, action_type, moderator_id, target_id, reason, details, timestamp_epoch) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            await db.executemany(ROLLUP_UPSERT, [key + (count,) for key, count in rollups.items()])
+            return ids
+        
+        return await self._write(operation)
+    
+    async def get_mod_logs(self, guild_id: int, moderator_id: int = None, target_id: int = None,
+                           action_type: str = None, since: datetime = None, until: datetime = None,
+                           before_id: int = None, limit: int = 10,
+                           include_archived: bool = False) -> List[Dict[str, Any]]:
+        """Get a page of moderation logs, newest first, using keyset pagination on id
+        
+        With include_archived, rows moved to the archive database are merged in by id.
+        """
+        conditions = ["guild_id = ?"]
+        parameters = [guild_id]
+        
+        if moderator_id is not None:
+            conditions.append("moderator_id = ?")
+            parameters.append(moderator_id)
+        if target_id is not None:
+            conditions.append("target_id = ?")
+            parameters.append(target_id)
+        if action_type is not None:
+            conditions.append("action_type = ?")
+            parameters.append(action_type)
+        if since is not None:
+            conditions.append("timestamp_epoch >= ?")
+            parameters.append(to_epoch(since))
+        if until is not None:
+            conditions.append("timestamp_epoch < ?")
+            parameters.append(to_epoch(until))
+        if before_id is not None:
+            conditions.append("id < ?")
+            parameters.append(before_id)
+        
+        where = ' AND '.join(conditions)
+        if include_archived and self.archive_path:
+            sql = (
+                f"SELECT {MOD_LOG_COLUMNS} FROM mod_logs WHERE {where} "
+                f"UNION ALL SELECT {MOD_LOG_COLUMNS} FROM archive.mod_logs WHERE {where} "
+                "ORDER BY id DESC LIMIT ?"
+            )
+            parameters = parameters * 2
+        else:
+            sql = f"SELECT {MOD_LOG_COLUMNS} FROM mod_logs WHERE {where} ORDER BY id DESC LIMIT ?"
+        
+        parameters.append(limit)
+        rows = await self._fetchall(sql, tuple(parameters))
+        
+        return [self._mod_log_from_row(row) for row in rows]
+    
+    async def archive_mod_logs(self, guild_id: int, older_than: datetime, batch_size: int = 1000) -> int:
+        """Move one batch of a guild's mod_logs rows older than a cutoff into the archive
+        
+        Returns the number of rows moved; call repeatedly until it returns 0. Rows
+        are copied with INSERT OR IGNORE so a batch interrupted between the copy and
+        the delete is simply retried.
+        """
+        if not self.archive_path:
+            return 0
+        
+        cutoff = to_epoch(older_than)
+        
+        async def operation(db):
+            cursor = await db.execute(
+                "SELECT MAX(id) FROM (SELECT id FROM mod_logs WHERE guild_id = ? AND timestamp_epoch < ? "
+                "ORDER BY id LIMIT ?)",
+                (guild_id, cutoff, batch_size)
+            )
+            last_id = (await cursor.fetchone())[0]
+            if last_id is None:
+                return 0
+            
+            batch = "FROM mod_logs WHERE guild_id = ? AND timestamp_epoch < ? AND id <= ?"
+            await db.execute(
+                f"INSERT OR IGNORE INTO archive.mod_logs ({MOD_LOG_COLUMNS}) SELECT {MOD_LOG_COLUMNS} {batch}",
+                (guild_id, cutoff, last_id)
+            )
+            cursor = await db.execute(f"DELETE {batch}", (guild_id, cutoff, last_id))
+            return cursor.rowcount
+        
+        return await self._write(operation)
+    
+    async def search_mod_history(self, guild_id: int, query: str, since: datetime = None,
+                                 limit: int = 500) -> List[Tuple[str, int]]:
+        """Full-text search a guild's warnings and moderation logs
+        
+        Returns up to ``limit`` (source, id) keys, best matches first. bm25 scores
+        shift as rows are added, so callers page through this ranked list with
+        get_mod_history_entries instead of searching again for every page.
+        """
+        terms = self._fts_query(query)
+        if not terms:
+            return []
+        
+        # The guild is part of the MATCH so only its rows are scored; weight 0 keeps it out of the ranking
+        guild = f'guild_id : "{int(guild_id)}"'
+        parameters = [f"{guild} AND reason : ({terms})"]
+        warnings_since = mod_logs_since = ""
+        if since is not None:
+            warnings_since = "AND w.timestamp_epoch >= ?"
+            parameters.append(to_epoch(since))
+        parameters.append(f"{guild} AND {{reason details}} : ({terms})")
+        if since is not None:
+            mod_logs_since = "AND m.timestamp_epoch >= ?"
+            parameters.append(to_epoch(since))
+        parameters.append(limit)
+        
+        rows = await self._fetchall(
+            f"""
+            SELECT source, id FROM (
+                SELECT bm25(warnings_fts, 0.0, 1.0) AS score, 'warning' AS source, w.id AS id
+                FROM warnings_fts JOIN warnings w ON w.id = warnings_fts.rowid
+                WHERE warnings_fts MATCH ? {warnings_since}
+                UNION ALL
+                SELECT bm25(mod_logs_fts, 0.0, 1.0, 1.0) AS score, 'mod_log' AS source, m.id AS id
+                FROM mod_logs_fts JOIN mod_logs m ON m.id = mod_logs_fts.rowid
+                WHERE mod_logs_fts MATCH ? {mod_logs_since}
+            )
+            ORDER BY score, source, id
+            LIMIT ?
+            """,
+            tuple(parameters)
         )
-        await self.db.commit()
+        
+        return [(row[0], row[1]) for row in rows]
+    
+    async def get_mod_history_entries(self, keys: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """Get the warnings and moderation logs for (source, id) keys, in key order"""
+        warning_ids = [row_id for source, row_id in keys if source == 'warning']
+        log_ids = [row_id for source, row_id in keys if source == 'mod_log']
+        
+        entries: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        if warning_ids:
+            rows = await self._fetchall(
+                f"""
+                SELECT id, guild_id, 'Warning', moderator_id, user_id, reason, NULL, timestamp, timestamp_epoch
+                FROM warnings WHERE id IN ({', '.join('?' * len(warning_ids))})
+                """,
+                tuple(warning_ids)
+            )
+            for row in rows:
+                entries[('warning', row[0])] = self._mod_log_from_row(row)
+        if log_ids:
+            rows = await self._fetchall(
+                f"SELECT {MOD_LOG_COLUMNS} FROM mod_logs WHERE id IN ({', '.join('?' * len(log_ids))})",
+                tuple(log_ids)
+            )
+            for row in rows:
+                entries[('mod_log', row[0])] = self._mod_log_from_row(row)
+        
+        results = []
+        for key in keys:
+            entry = entries.get(tuple(key))
+            if entry is not None:
+                entry['source'] = key[0]
+                results.append(entry)
+        return results
+    
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Quote each search term so user input can't inject FTS5 syntax"""
+        terms = query.replace('"', ' ').split()
+        return " ".join(f'"{term}"' for term in terms)
+    
+    @staticmethod
+    def _mod_log_from_row(row: tuple) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'guild_id': row[1],
+            'action_type': row[2],
+            'moderator_id': row[3],
+            'target_id': row[4],
+            'reason': row[5],
+            'details': row[6],
+            'timestamp': row[7],
+            'timestamp_epoch': row[8]
+        }
+    
+    # Moderation analytics methods
+    async def get_mod_stats(self, guild_id: int, since: datetime = None,
+                            moderator_id: int = None) -> List[Dict[str, Any]]:
+        """Get daily rollup rows (day, moderator_id, action_type, count) for a guild
+        
+        Reads only mod_action_daily, so the cost grows with days rather than actions.
+        """
+        conditions = ["guild_id = ?"]
+        parameters = [guild_id]
+        if since is not None:
+            conditions.append("day >= ?")
+            parameters.append(to_epoch(since) // 86400)
+        if moderator_id is not None:
+            conditions.append("moderator_id = ?")
+            parameters.append(moderator_id)
+        
+        rows = await self._fetchall(
+            f"SELECT day, moderator_id, action_type, count FROM mod_action_daily WHERE {' AND '.join(conditions)}",
+            tuple(parameters)
+        )
+        
+        return [
+            {'day': row[0], 'moderator_id': row[1], 'action_type': row[2], 'count': row[3]}
+            for row in rows
+        ]
+    
+    async def rebuild_mod_stats(self, guild_id: int = None) -> int:
+        """Recompute daily rollups from mod_logs (and the archive), for one guild or all
+        
+        Returns the number of rollup rows written.
+        """
+        sources = ["mod_logs"] + (["archive.mod_logs"] if self.archive_path else [])
+        guild_filter = "AND guild_id = ?" if guild_id is not None else ""
+        branch_parameters = (guild_id,) if guild_id is not None else ()
+        
+        union = " UNION ALL ".join(
+            f"SELECT guild_id, timestamp_epoch, moderator_id, action_type FROM {source} "
+            f"WHERE timestamp_epoch IS NOT NULL {guild_filter}"
+            for source in sources
+        )
+        
+        async def operation(db):
+            await db.execute(
+                f"DELETE FROM mod_action_daily WHERE 1 {guild_filter}",
+                branch_parameters
+            )
+            cursor = await db.execute(
+                f"""
+                INSERT INTO mod_action_daily (guild_id, day, moderator_id, action_type, count)
+                SELECT guild_id, timestamp_epoch / 86400, moderator_id, action_type, COUNT(*)
+                FROM ({union})
+                GROUP BY guild_id, timestamp_epoch / 86400, moderator_id, action_type
+                """,
+                branch_parameters * len(sources)
+            )
+            return cursor.rowcount
+        
+        return await self._write(operation)
+    
+    # Background job methods
+    async def create_job(self, guild_id: int, job_type: str, params: Dict[str, Any],
+                         created_by: int, total: int = 0, channel_id: int = None) -> int:
+        """Record a new pending job and return its ID"""
+        now = int(time.time())
+        cursor = await self._execute_write(
+            "INSERT INTO jobs (guild_id, job_type, params, total, created_by, created_epoch, updated_epoch, channel_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, job_type, json.dumps(params), total, created_by, now, now, channel_id)
+        )
+        return cursor.lastrowid
+    
+    async def set_job_message(self, job_id: int, message_id: int):
+        """Record the channel message a job reports its progress on"""
+        await self._execute_write("UPDATE jobs SET message_id = ? WHERE id = ?", (message_id, job_id))
+    
+    async def update_job_progress(self, job_id: int, cursor: Any, processed: int, succeeded: int, failed: int):
+        """Checkpoint a job's cursor and progress counters"""
+        await self._execute_write(
+            "UPDATE jobs SET cursor = ?, processed = ?, succeeded = ?, failed = ?, updated_epoch = ? WHERE id = ?",
+            (json.dumps(cursor), processed, succeeded, failed, int(time.time()), job_id)
+        )
+    
+    async def set_job_status(self, job_id: int, status: str, error: str = None):
+        """Move a job to a new status"""
+        await self._execute_write(
+            "UPDATE jobs SET status = ?, error = ?, updated_epoch = ? WHERE id = ?",
+            (status, error, int(time.time()), job_id)
+        )
+    
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job by ID"""
+        row = await self._fetchone(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,))
+        return self._job_from_row(row) if row else None
+    
+    async def get_jobs(self, guild_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get a guild's most recent jobs, newest first"""
+        rows = await self._fetchall(
+            f"SELECT {JOB_COLUMNS} FROM jobs WHERE guild_id = ? ORDER BY id DESC LIMIT ?",
+            (guild_id, limit)
+        )
+        return [self._job_from_row(row) for row in rows]
+    
+    async def get_resumable_jobs(self) -> List[Dict[str, Any]]:
+        """Get every job that was pending or running when the bot last stopped"""
+        rows = await self._fetchall(
+            f"SELECT {JOB_COLUMNS} FROM jobs WHERE status IN (?, ?) ORDER BY id",
+            RESUMABLE_JOB_STATUSES
+        )
+        return [self._job_from_row(row) for row in rows]
+    
+    @staticmethod
+    def _job_from_row(row: tuple) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'guild_id': row[1],
+            'job_type': row[2],
+            'params': json.loads(row[3]) if row[3] else {},
+            'cursor': json.loads(row[4]) if row[4] else None,
+            'status': row[5],
+            'total': row[6],
+            'processed': row[7],
+            'succeeded': row[8],
+            'failed': row[9],
+            'created_by': row[10],
+            'created_epoch': row[11],
+            'updated_epoch': row[12],
+            'error': row[13],
+            'channel_id': row[14],
+            'message_id': row[15]
+        }
+    
+    # Lockdown snapshot methods
+    async def save_lockdown_channels(self, guild_id: int, channels: Iterable[Tuple[int, Optional[bool]]], locked_by: int) -> int:
+        """Record (channel_id, original_send_messages) pairs before locking
+        
+        Channels that are already locked keep their first snapshot, so locking
+        twice (or resuming a lockdown) never records the locked state as original.
+        """
+        now = int(time.time())
+        rows = [
+            (guild_id, channel_id, None if original is None else int(original), locked_by, now)
+            for channel_id, original in channels
+        ]
+        if not rows:
+            return 0
+        
+        async def operation(db):
+            cursor = await db.executemany(
+                "INSERT OR IGNORE INTO lockdown_channels (guild_id, channel_id, original_send_messages, locked_by, locked_epoch) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            return cursor.rowcount
+        
+        return await self._write(operation)
+    
+    async def get_lockdown_channels(self, guild_id: int) -> Dict[int, Dict[str, Any]]:
+        """Get a guild's locked channels keyed by channel ID"""
+        rows = await self._fetchall(
+            "SELECT channel_id, original_send_messages, locked_by, locked_epoch FROM lockdown_channels WHERE guild_id = ?",
+            (guild_id,)
+        )
+        return {
+            row[0]: {
+                'original_send_messages': None if row[1] is None else bool(row[1]),
+                'locked_by': row[2],
+                'locked_epoch': row[3]
+            }
+            for row in rows
+        }
+    
+    async def remove_lockdown_channels(self, guild_id: int, channel_ids: Iterable[int]) -> int:
+        """Forget the snapshots of channels that were unlocked"""
+        parameters = [(guild_id, channel_id) for channel_id in channel_ids]
+        if not parameters:
+            return 0
+        
+        async def operation(db):
+            cursor = await db.executemany(
+                "DELETE FROM lockdown_channels WHERE guild_id = ? AND channel_id = ?",
+                parameters
+            )
+            return cursor.rowcount
+        
+        return await self._write(operation)
+    
+    # Permission snapshot methods
+    async def create_permission_snapshot(self, guild_id: int, name: str, created_by: int, data: bytes,
+                                         channel_count: int, role_count: int) -> int:
+        """Store an encoded permission snapshot and return its ID"""
+        cursor = await self._execute_write(
+            "INSERT INTO permission_snapshots (guild_id, name, created_by, created_epoch, channel_count, role_count, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, name, created_by, int(time.time()), channel_count, role_count, data)
+        )
+        return cursor.lastrowid
+    
+    async def get_permission_snapshots(self, guild_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get a guild's most recent snapshots without their data, newest first"""
+        rows = await self._fetchall(
+            f"SELECT {SNAPSHOT_COLUMNS} FROM permission_snapshots WHERE guild_id = ? ORDER BY id DESC LIMIT ?",
+            (guild_id, limit)
+        )
+        return [self._snapshot_from_row(row) for row in rows]
+    
+    async def get_permission_snapshot(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """Get a snapshot by ID, including its encoded data"""
+        row = await self._fetchone(
+            f"SELECT {SNAPSHOT_COLUMNS}, data FROM permission_snapshots WHERE id = ?",
+            (snapshot_id,)
+        )
+        if not row:
+            return None
+        snapshot = self._snapshot_from_row(row)
+        snapshot['data'] = row[8]
+        return snapshot
+    
+    async def delete_permission_snapshot(self, snapshot_id: int) -> bool:
+        """Delete a snapshot by ID"""
+        cursor = await self._execute_write("DELETE FROM permission_snapshots WHERE id = ?", (snapshot_id,))
+        return cursor.rowcount > 0
+    
+    @staticmethod
+    def _snapshot_from_row(row: tuple) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'guild_id': row[1],
+            'name': row[2],
+            'created_by': row[3],
+            'created_epoch': row[4],
+            'channel_count': row[5],
+            'role_count': row[6],
+            'size': row[7]
+        }
+    
+    # Export methods
+    async def iter_guild_history(self, guild_id: int, table: str,
+                                 chunk_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield a guild's rows from a history table in id order, chunk_size rows at a time
+        
+        Each chunk is a separate keyset query, so no connection is held between chunks.
+        """
+        columns = HISTORY_TABLES[table]
+        names = [name.strip() for name in columns.split(',')]
+        last_id = 0
+        
+        while True:
+            rows = await self._fetchall(
+                f"SELECT {columns} FROM {table} WHERE guild_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (guild_id, last_id, chunk_size)
+            )
+            if not rows:
+                return
+            
+            yield [dict(zip(names, row)) for row in rows]
+            
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
     
     # Guild settings methods
-    async def setup_guild(self, guild_id: int):
-        """Initialize guild settings"""
-        await self.db.execute(
-            "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)",
+    @staticmethod
+    def _settings_from_row(row: Optional[tuple]) -> Dict[str, Any]:
+        """Build a cache entry from a (mod_log_channel, mute_role_id, settings_json) row"""
+        if not row:
+            return {'mod_log_channel': None, 'mute_role_id': None, 'settings': {}}
+        
+        try:
+            extra = json.loads(row[2]) if row[2] else {}
+        except ValueError:
+            extra = {}
+        
+        return {'mod_log_channel': row[0], 'mute_role_id': row[1], 'settings': extra}
+    
+    async def load_guild_settings(self):
+        """Bulk-load every guild's settings into the cache"""
+        rows = await self._fetchall("SELECT guild_id, mod_log_channel, mute_role_id, settings_json FROM guild_settings")
+        
+        for row in rows:
+            self._settings_cache[row[0]] = self._settings_from_row(row[1:])
+        
+        logging.info(f"Cached settings for {len(rows)} guilds")
+    
+    async def _get_guild_settings(self, guild_id: int) -> Dict[str, Any]:
+        """Get cached settings for a guild, loading them on a miss"""
+        settings = self._settings_cache.get(guild_id)
+        if settings is not None:
+            self.settings_cache_hits += 1
+            return settings
+        
+        self.settings_cache_misses += 1
+        row = await self._fetchone(
+            "SELECT mod_log_channel, mute_role_id, settings_json FROM guild_settings WHERE guild_id = ?",
             (guild_id,)
         )
-        await self.db.commit()
+        
+        # Guilds without a row are cached too so repeated lookups stay in memory
+        settings = self._settings_from_row(row)
+        self._settings_cache[guild_id] = settings
+        return settings
+    
+    def settings_cache_stats(self) -> Dict[str, Any]:
+        """Get guild settings cache counters"""
+        lookups = self.settings_cache_hits + self.settings_cache_misses
+        return {
+            'hits': self.settings_cache_hits,
+            'misses': self.settings_cache_misses,
+            'size': len(self._settings_cache),
+            'hit_rate': self.settings_cache_hits / lookups if lookups else 0.0
+        }
+    
+    async def setup_guild(self, guild_id: int):
+        """Initialize guild settings"""
+        async def operation(db):
+            await db.execute("INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)", (guild_id,))
+            cursor = await db.execute(
+                "SELECT mod_log_channel, mute_role_id, settings_json FROM guild_settings WHERE guild_id = ?",
+                (guild_id,)
+            )
+            return await cursor.fetchone()
+        
+        row = await self._write(operation)
+        self._settings_cache[guild_id] = self._settings_from_row(row)
+    
+    async def _set_guild_column(self, guild_id: int, column: str, value: Any):
+        """Update a guild_settings column and write it through to the cache"""
+        async def operation(db):
+            await db.execute("INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)", (guild_id,))
+            await db.execute(
+                f"UPDATE guild_settings SET {column} = ? WHERE guild_id = ?",
+                (value, guild_id)
+            )
+        
+        await self._write(operation)
+        
+        settings = self._settings_cache.get(guild_id)
+        if settings is None:
+            await self._get_guild_settings(guild_id)
+        else:
+            settings[column] = value
+    
+    async def get_guild_setting(self, guild_id: int, key: str, default: Any = None) -> Any:
+        """Get a per-guild setting stored in settings_json"""
+        settings = await self._get_guild_settings(guild_id)
+        return settings['settings'].get(key, default)
+    
+    async def set_guild_setting(self, guild_id: int, key: str, value: Any):
+        """Set a per-guild setting stored in settings_json; None removes it"""
+        async def operation(db):
+            await db.execute("INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)", (guild_id,))
+            cursor = await db.execute("SELECT settings_json FROM guild_settings WHERE guild_id = ?", (guild_id,))
+            row = await cursor.fetchone()
+            
+            try:
+                extra = json.loads(row[0]) if row and row[0] else {}
+            except ValueError:
+                extra = {}
+            if value is None:
+                extra.pop(key, None)
+            else:
+                extra[key] = value
+            
+            await db.execute(
+                "UPDATE guild_settings SET settings_json = ? WHERE guild_id = ?",
+                (json.dumps(extra), guild_id)
+            )
+            return extra
+        
+        extra = await self._write(operation)
+        settings = await self._get_guild_settings(guild_id)
+        settings['settings'] = extra
+    
+    def guilds_with_setting(self, key: str) -> Dict[int, Any]:
+        """Get every cached guild that has a settings_json key set"""
+        return {
+            guild_id: settings['settings'][key]
+            for guild_id, settings in self._settings_cache.items()
+            if settings['settings'].get(key) is not None
+        }
     
     async def set_mod_log_channel(self, guild_id: int, channel_id: int):
         """Set moderation log channel for a guild"""
-        await self.setup_guild(guild_id)
-        await self.db.execute(
-            "UPDATE guild_settings SET mod_log_channel = ? WHERE guild_id = ?",
-            (channel_id, guild_id)
-        )
-        await self.db.commit()
+        await self._set_guild_column(guild_id, 'mod_log_channel', channel_id)
     
     async def get_mod_log_channel(self, guild_id: int) -> Optional[int]:
         """Get moderation log channel for a guild"""
-        cursor = await self.db.execute(
-            "SELECT mod_log_channel FROM guild_settings WHERE guild_id = ?",
-            (guild_id,)
-        )
-        result = await cursor.fetchone()
-        return result[0] if result and result[0] else None
+        settings = await self._get_guild_settings(guild_id)
+        return settings['mod_log_channel'] or None
     
     async def set_mute_role(self, guild_id: int, role_id: int):
         """Set mute role for a guild"""
-        await self.setup_guild(guild_id)
-        await self.db.execute(
-            "UPDATE guild_settings SET mute_role_id = ? WHERE guild_id = ?",
-            (role_id, guild_id)
-        )
-        await self.db.commit()
+        await self._set_guild_column(guild_id, 'mute_role_id', role_id)
     
     async def get_mute_role(self, guild_id: int) -> Optional[int]:
         """Get mute role for a guild"""
-        cursor = await self.db.execute(
-            "SELECT mute_role_id FROM guild_settings WHERE guild_id = ?",
-            (guild_id,)
-        )
-        result = await cursor.fetchone()
-        return result[0] if result and result[0] else None
+        settings = await self._get_guild_settings(guild_id)
+        return settings['mute_role_id'] or None
@@ -6,8 +6,12 @@ import json
 import logging
 import sys
 from bot_config import BotConfig
-from database import Database
+from storage import create_storage
 from web_server import WebServer
+from utils.mute_scheduler import MuteScheduler
+from utils.mute_roles import MuteRoleProvisioner
+from utils.escalation import EscalationEngine
+from utils.jobs import JobManager
 import threading
 
 # Performance optimizations
@@ -79,7 +83,11 @@ class AdminBot(commands.Bot):
         )
         
         self.config = BotConfig()
-        self.db = Database()
+        self.db = create_storage(self.config)
+        self.mute_scheduler = MuteScheduler(self)
+        self.mute_provisioner = MuteRoleProvisioner(self)
+        self.escalation = EscalationEngine(self)
+        self.jobs = JobManager(self)
         self.web_server = None
         
     async def setup_hook(self):
@@ -87,13 +95,22 @@ class AdminBot(commands.Bot):
         # Initialize database
         await self.db.initialize()
         
+        # Start timed mute expiry
+        await self.mute_scheduler.start()
+        
         # Load all cogs
         cog_files = [
             'cogs.moderation',
+            'cogs.escalation',
             'cogs.utility', 
             'cogs.server_management',
             'cogs.special_commands',
             'cogs.message_reports',
+            'cogs.automod',
+            'cogs.mod_logs',
+            'cogs.maintenance',
+            'cogs.jobs',
+            'cogs.snapshots',
             'cogs.keepalive'
         ]
         
@@ -104,6 +121,9 @@ class AdminBot(commands.Bot):
             except Exception as e:
                 logging.error(f'Failed to load cog {cog}: {e}')
         
+        # Resume interrupted background jobs now that their handlers are registered
+        await self.jobs.start()
+        
         # Sync slash commands
         try:
             synced = await self.tree.sync()
@@ -124,6 +144,14 @@ class AdminBot(commands.Bot):
         except Exception as e:
             logging.error(f'Failed to start web server: {e}')
     
+    async def close(self):
+        """Stop background systems and close the database on shutdown"""
+        await super().close()
+        await self.mute_scheduler.stop()
+        await self.mute_provisioner.stop()
+        await self.jobs.stop()
+        await self.db.close()
+    
     async def on_ready(self):
         """Called when the bot is ready"""
         logging.info(f'{self.user} has logged in and is ready!')
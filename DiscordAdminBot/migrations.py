@@ -0,0 +1,282 @@
+"""Versioned schema migrations for the bot database.
+
+Each entry is ``(version, description, statements)``. Versions are applied in
+order and the highest applied version is stored in ``PRAGMA user_version``, so
+a database that is already current skips all DDL at startup. Statements must
+be idempotent (``IF NOT EXISTS`` etc.) because databases created before the
+migration framework existed start at version 0 with the base tables in place.
+Later steps that can't be written idempotently (``ALTER TABLE ADD COLUMN``)
+rely on running exactly once inside the same transaction as the version bump.
+"""
+from typing import List, Tuple
+
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Base tables", [
+        # Warnings table
+        """
+        CREATE TABLE IF NOT EXISTS warnings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+
+        # Mutes table
+        """
+        CREATE TABLE IF NOT EXISTS mutes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT,
+            start_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+            end_time DATETIME,
+            active BOOLEAN DEFAULT 1
+        )
+        """,
+
+        # Moderation logs table
+        """
+        CREATE TABLE IF NOT EXISTS mod_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            action_type TEXT NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            target_id INTEGER,
+            reason TEXT,
+            details TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+
+        # Guild settings table
+        """
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            mod_log_channel INTEGER,
+            mute_role_id INTEGER,
+            settings_json TEXT DEFAULT '{}'
+        )
+        """
+    ]),
+
+    (2, "Composite indexes for warning, mute and log lookups", [
+        "CREATE INDEX IF NOT EXISTS idx_warnings_guild_user ON warnings (guild_id, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_mutes_guild_user_active ON mutes (guild_id, user_id, active)",
+        "CREATE INDEX IF NOT EXISTS idx_mutes_active_end ON mutes (active, end_time)",
+        "CREATE INDEX IF NOT EXISTS idx_mod_logs_guild_time ON mod_logs (guild_id, timestamp)"
+    ]),
+
+    (3, "Indexes for keyset-paginated mod_logs queries", [
+        "CREATE INDEX IF NOT EXISTS idx_mod_logs_guild ON mod_logs (guild_id)",
+        "CREATE INDEX IF NOT EXISTS idx_mod_logs_guild_moderator ON mod_logs (guild_id, moderator_id)",
+        "CREATE INDEX IF NOT EXISTS idx_mod_logs_guild_target ON mod_logs (guild_id, target_id)",
+        "CREATE INDEX IF NOT EXISTS idx_mod_logs_guild_action ON mod_logs (guild_id, action_type)"
+    ]),
+
+    (4, "Incrementally maintained warning counters", [
+        """
+        CREATE TABLE IF NOT EXISTS warning_counts (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+        """,
+        "DELETE FROM warning_counts",
+        """
+        INSERT INTO warning_counts (guild_id, user_id, count)
+        SELECT guild_id, user_id, COUNT(*) FROM warnings GROUP BY guild_id, user_id
+        """
+    ]),
+
+    (5, "Full-text search over warning and moderation log reasons", [
+        # guild_id is indexed too so that searches filter by guild inside the MATCH
+        # and only that guild's rows are scored
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS warnings_fts USING fts5(
+            guild_id, reason, content='warnings', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS mod_logs_fts USING fts5(
+            guild_id, reason, details, content='mod_logs', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+
+        # Keep the external-content indexes in sync with their source tables
+        """
+        CREATE TRIGGER IF NOT EXISTS warnings_fts_insert AFTER INSERT ON warnings BEGIN
+            INSERT INTO warnings_fts (rowid, guild_id, reason) VALUES (new.id, new.guild_id, new.reason);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS warnings_fts_delete AFTER DELETE ON warnings BEGIN
+            INSERT INTO warnings_fts (warnings_fts, rowid, guild_id, reason) VALUES ('delete', old.id, old.guild_id, old.reason);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS warnings_fts_update AFTER UPDATE OF guild_id, reason ON warnings BEGIN
+            INSERT INTO warnings_fts (warnings_fts, rowid, guild_id, reason) VALUES ('delete', old.id, old.guild_id, old.reason);
+            INSERT INTO warnings_fts (rowid, guild_id, reason) VALUES (new.id, new.guild_id, new.reason);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS mod_logs_fts_insert AFTER INSERT ON mod_logs BEGIN
+            INSERT INTO mod_logs_fts (rowid, guild_id, reason, details) VALUES (new.id, new.guild_id, new.reason, new.details);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS mod_logs_fts_delete AFTER DELETE ON mod_logs BEGIN
+            INSERT INTO mod_logs_fts (mod_logs_fts, rowid, guild_id, reason, details) VALUES ('delete', old.id, old.guild_id, old.reason, old.details);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS mod_logs_fts_update AFTER UPDATE OF guild_id, reason, details ON mod_logs BEGIN
+            INSERT INTO mod_logs_fts (mod_logs_fts, rowid, guild_id, reason, details) VALUES ('delete', old.id, old.guild_id, old.reason, old.details);
+            INSERT INTO mod_logs_fts (rowid, guild_id, reason, details) VALUES (new.id, new.guild_id, new.reason, new.details);
+        END
+        """,
+
+        # Index rows written before the search tables existed
+        "INSERT INTO warnings_fts (warnings_fts) VALUES ('rebuild')",
+        "INSERT INTO mod_logs_fts (mod_logs_fts) VALUES ('rebuild')"
+    ]),
+
+    (6, "Epoch-second timestamp columns for mutes, warnings and logs", [
+        "ALTER TABLE warnings ADD COLUMN timestamp_epoch INTEGER",
+        "ALTER TABLE mod_logs ADD COLUMN timestamp_epoch INTEGER",
+        "ALTER TABLE mutes ADD COLUMN start_epoch INTEGER",
+        "ALTER TABLE mutes ADD COLUMN end_epoch INTEGER",
+
+        # CURRENT_TIMESTAMP defaults are UTC; mute end times were written in local time
+        "UPDATE warnings SET timestamp_epoch = CAST(strftime('%s', timestamp) AS INTEGER)",
+        "UPDATE mod_logs SET timestamp_epoch = CAST(strftime('%s', timestamp) AS INTEGER)",
+        "UPDATE mutes SET start_epoch = CAST(strftime('%s', start_time) AS INTEGER)",
+        "UPDATE mutes SET end_epoch = CAST(strftime('%s', end_time, 'utc') AS INTEGER) WHERE end_time IS NOT NULL",
+
+        "DROP INDEX IF EXISTS idx_mutes_active_end",
+        "DROP INDEX IF EXISTS idx_mod_logs_guild_time",
+        "CREATE INDEX IF NOT EXISTS idx_mutes_active_end_epoch ON mutes (active, end_epoch)",
+        "CREATE INDEX IF NOT EXISTS idx_mod_logs_guild_time_epoch ON mod_logs (guild_id, timestamp_epoch)"
+    ]),
+
+    (7, "Daily moderation action rollups", [
+        # day is the UTC day number (timestamp_epoch / 86400)
+        """
+        CREATE TABLE IF NOT EXISTS mod_action_daily (
+            guild_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            action_type TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, moderator_id, action_type)
+        ) WITHOUT ROWID
+        """,
+        "DELETE FROM mod_action_daily",
+        """
+        INSERT INTO mod_action_daily (guild_id, day, moderator_id, action_type, count)
+        SELECT guild_id, timestamp_epoch / 86400, moderator_id, action_type, COUNT(*)
+        FROM mod_logs WHERE timestamp_epoch IS NOT NULL
+        GROUP BY guild_id, timestamp_epoch / 86400, moderator_id, action_type
+        """
+    ]),
+
+    (8, "Persisted background jobs", [
+        # params and cursor hold JSON; status is pending, running, completed, cancelled or failed
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            job_type TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            cursor TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            total INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            succeeded INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            created_by INTEGER NOT NULL,
+            created_epoch INTEGER NOT NULL,
+            updated_epoch INTEGER NOT NULL,
+            error TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_guild ON jobs (guild_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)"
+    ]),
+
+    (9, "Persisted mass lockdown snapshots", [
+        # original_send_messages is the @everyone overwrite before locking: NULL (inherit), 0 or 1
+        """
+        CREATE TABLE IF NOT EXISTS lockdown_channels (
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            original_send_messages INTEGER,
+            locked_by INTEGER NOT NULL,
+            locked_epoch INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, channel_id)
+        ) WITHOUT ROWID
+        """
+    ]),
+
+    (10, "Permission overwrite snapshots", [
+        # data is a zlib-compressed JSON document of role permissions and channel overwrites
+        """
+        CREATE TABLE IF NOT EXISTS permission_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            created_by INTEGER NOT NULL,
+            created_epoch INTEGER NOT NULL,
+            channel_count INTEGER NOT NULL,
+            role_count INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_permission_snapshots_guild ON permission_snapshots (guild_id, id)"
+    ]),
+
+    (11, "Expiring warnings and windowed warning counts", [
+        # Expired warnings stay in the history but no longer count; warning_counts holds active rows only
+        "ALTER TABLE warnings ADD COLUMN active INTEGER NOT NULL DEFAULT 1",
+        # Counts a member's active warnings within an escalation window
+        "CREATE INDEX IF NOT EXISTS idx_warnings_guild_user_active ON warnings (guild_id, user_id, active, timestamp_epoch)",
+        # Lets the expiry sweeper find a guild's oldest active warnings; shrinks as they expire
+        "CREATE INDEX IF NOT EXISTS idx_warnings_active_time ON warnings (guild_id, timestamp_epoch) WHERE active = 1"
+    ]),
+
+    (12, "Progress message location for background jobs", [
+        # Lets a resumed job keep editing the same channel message after the interaction has expired
+        "ALTER TABLE jobs ADD COLUMN channel_id INTEGER",
+        "ALTER TABLE jobs ADD COLUMN message_id INTEGER"
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Schema of the attached cold-storage database for archived mod_logs rows. It
+# is created idempotently each time the archive is attached.
+ARCHIVE_SCHEMA: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.mod_logs (
+        id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        action_type TEXT NOT NULL,
+        moderator_id INTEGER NOT NULL,
+        target_id INTEGER,
+        reason TEXT,
+        details TEXT,
+        timestamp DATETIME,
+        timestamp_epoch INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_mod_logs_guild ON mod_logs (guild_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_mod_logs_guild_moderator ON mod_logs (guild_id, moderator_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_mod_logs_guild_target ON mod_logs (guild_id, target_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_mod_logs_guild_action ON mod_logs (guild_id, action_type)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_mod_logs_guild_time_epoch ON mod_logs (guild_id, timestamp_epoch)"
+]
@@ -0,0 +1,34 @@
+from storage.base import Storage
+from storage.memory import MemoryStorage
+from storage.instrumented import InstrumentedStorage, StorageMetrics
+from database import Database
+
+STORAGE_BACKENDS = ("sqlite", "memory")
+
+def create_storage(config) -> Storage:
+    """Build the storage engine selected by the storage_backend config key
+
+    With db_instrumentation enabled the engine is wrapped so every call is timed.
+    """
+    storage = _create_engine(config)
+    if config.get('db_instrumentation', True):
+        return InstrumentedStorage(storage, slow_query_ms=config.get('db_slow_query_ms', 100))
+    return storage
+
+def _create_engine(config) -> Storage:
+    backend = config.get('storage_backend', "sqlite")
+    if backend == "memory":
+        return MemoryStorage()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown storage_backend {backend!r}; expected one of {', '.join(STORAGE_BACKENDS)}")
+
+    return Database(
+        group_commit=config.get('db_group_commit', False),
+        commit_interval_ms=config.get('db_commit_interval_ms', 50),
+        commit_max_batch=config.get('db_commit_max_batch', 100),
+        wal_mode=config.get('db_wal_mode', False),
+        reader_pool_size=config.get('db_reader_pool_size', 4),
+        archive_path=config.get('db_archive_path')
+    )
+
+__all__ = ["Storage", "MemoryStorage", "Database", "InstrumentedStorage", "StorageMetrics", "create_storage"]
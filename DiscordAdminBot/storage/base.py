@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Protocol, Tuple, runtime_checkable
+
+@runtime_checkable
+class Storage(Protocol):
+    """Operations the cogs rely on, implemented by every storage engine
+
+    Rows are returned as plain dicts with the same keys regardless of engine, so
+    cogs never need to know which engine is behind ``bot.db``.
+    """
+
+    # Path of the cold-storage archive, or None when the engine has no archive
+    archive_path: Optional[str]
+
+    @property
+    def history_tables(self) -> List[str]:
+        """Tables that make up a guild's moderation history, in export order"""
+        ...
+
+    # Lifecycle
+    async def initialize(self):
+        ...
+
+    async def close(self):
+        ...
+
+    async def ping(self):
+        """Cheap round trip used to check the engine is responsive"""
+        ...
+
+    # Warnings
+    async def add_warning(self, guild_id: int, user_id: int, moderator_id: int, reason: str) -> int:
+        ...
+
+    async def add_warnings_bulk(self, warnings: Iterable[Tuple[int, int, int, str]]) -> range:
+        ...
+
+    async def get_warnings(self, guild_id: int, user_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        ...
+
+    async def clear_warnings(self, guild_id: int, user_id: int) -> int:
+        ...
+
+    async def get_warning_count(self, guild_id: int, user_id: int) -> int:
+        ...
+
+    async def count_warnings_since(self, guild_id: int, user_id: int, since: datetime) -> int:
+        ...
+
+    async def expire_warnings(self, guild_id: int, older_than: datetime, batch_size: int = 1000) -> int:
+        ...
+
+    # Mutes
+    async def add_mute(self, guild_id: int, user_id: int, moderator_id: int, reason: str, duration: timedelta = None) -> int:
+        ...
+
+    async def add_mutes_bulk(self, mutes: Iterable[Tuple[int, int, int, str, Optional[timedelta]]]) -> range:
+        ...
+
+    async def remove_mute(self, guild_id: int, user_id: int) -> bool:
+        ...
+
+    async def remove_mutes(self, mute_ids: Iterable[int]) -> int:
+        ...
+
+    async def get_active_mute(self, guild_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def get_expired_mutes(self) -> List[Dict[str, Any]]:
+        ...
+
+    async def get_pending_mutes(self) -> List[Dict[str, Any]]:
+        ...
+
+    # Moderation logs
+    async def log_action(self, guild_id: int, action_type: str, moderator_id: int, target_id: int = None, reason: str = None, details: str = None):
+        ...
+
+    async def log_actions_bulk(self, actions: Iterable[Tuple[int, str, int, Optional[int], Optional[str], Optional[str]]]) -> range:
+        ...
+
+    async def get_mod_logs(self, guild_id: int, moderator_id: int = None, target_id: int = None,
+                           action_type: str = None, since: datetime = None, until: datetime = None,
+                           before_id: int = None, limit: int = 10,
+                           include_archived: bool = False) -> List[Dict[str, Any]]:
+        ...
+
+    async def archive_mod_logs(self, guild_id: int, older_than: datetime, batch_size: int = 1000) -> int:
+        ...
+
+    async def search_mod_history(self, guild_id: int, query: str, since: datetime = None,
+                                 limit: int = 500) -> List[Tuple[str, int]]:
+        ...
+
+    async def get_mod_history_entries(self, keys: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        ...
+
+    # Moderation analytics
+    async def get_mod_stats(self, guild_id: int, since: datetime = None,
+                            moderator_id: int = None) -> List[Dict[str, Any]]:
+        ...
+
+    async def rebuild_mod_stats(self, guild_id: int = None) -> int:
+        ...
+
+    # Background jobs
+    async def create_job(self, guild_id: int, job_type: str, params: Dict[str, Any],
+                         created_by: int, total: int = 0, channel_id: int = None) -> int:
+        ...
+
+    async def set_job_message(self, job_id: int, message_id: int):
+        ...
+
+    async def update_job_progress(self, job_id: int, cursor: Any, processed: int, succeeded: int, failed: int):
+        ...
+
+    async def set_job_status(self, job_id: int, status: str, error: str = None):
+        ...
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def get_jobs(self, guild_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        ...
+
+    async def get_resumable_jobs(self) -> List[Dict[str, Any]]:
+        ...
+
+    # Lockdown snapshots
+    async def save_lockdown_channels(self, guild_id: int, channels: Iterable[Tuple[int, Optional[bool]]], locked_by: int) -> int:
+        ...
+
+    async def get_lockdown_channels(self, guild_id: int) -> Dict[int, Dict[str, Any]]:
+        ...
+
+    async def remove_lockdown_channels(self, guild_id: int, channel_ids: Iterable[int]) -> int:
+        ...
+
+    # Permission snapshots
+    async def create_permission_snapshot(self, guild_id: int, name: str, created_by: int, data: bytes,
+                                         channel_count: int, role_count: int) -> int:
+        ...
+
+    async def get_permission_snapshots(self, guild_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        ...
+
+    async def get_permission_snapshot(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    async def delete_permission_snapshot(self, snapshot_id: int) -> bool:
+        ...
+
+    # Export
+    def iter_guild_history(self, guild_id: int, table: str,
+                           chunk_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        ...
+
+    # Guild settings
+    async def setup_guild(self, guild_id: int):
+        ...
+
+    async def get_guild_setting(self, guild_id: int, key: str, default: Any = None) -> Any:
+        ...
+
+    async def set_guild_setting(self, guild_id: int, key: str, value: Any):
+        ...
+
+    def guilds_with_setting(self, key: str) -> Dict[int, Any]:
+        ...
+
+    async def set_mod_log_channel(self, guild_id: int, channel_id: int):
+        ...
+
+    async def get_mod_log_channel(self, guild_id: int) -> Optional[int]:
+        ...
+
+    async def set_mute_role(self, guild_id: int, role_id: int):
+        ...
+
+    async def get_mute_role(self, guild_id: int) -> Optional[int]:
+        ...
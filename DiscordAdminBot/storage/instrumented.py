@@ -0,0 +1,236 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Upper bounds of the latency histogram buckets in milliseconds; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Long-running housekeeping calls; they get their own stats and never count as slow queries
+MAINTENANCE_METHODS = frozenset({
+    'initialize', 'close', 'load_guild_settings', 'backup_to', 'expire_warnings',
+    'archive_mod_logs', 'rebuild_mod_stats', 'iter_guild_history'
+})
+
+def _row_count(result: Any) -> Optional[int]:
+    """Number of rows a storage call returned, or None when the result isn't rows"""
+    if result is None:
+        return 0
+    if isinstance(result, dict):
+        return 1
+    if isinstance(result, (list, tuple, range)):
+        return len(result)
+    return None
+
+def _shape(value: Any) -> str:
+    """Describe a parameter without exposing its value (e.g. str[42], list[100])"""
+    if isinstance(value, (str, bytes, list, tuple, dict, set, range)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def parameters_shape(args: tuple, kwargs: Dict[str, Any]) -> str:
+    shapes = [_shape(arg) for arg in args]
+    shapes += [f"{key}={_shape(value)}" for key, value in kwargs.items()]
+    return f"({', '.join(shapes)})"
+
+class LatencyStats:
+    """Call count, row count and a fixed-bucket latency histogram for one method"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float, rows: Optional[int] = None, error: bool = False):
+        self.calls += 1
+        self.errors += error
+        self.rows += rows or 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Estimate a percentile as the upper bound of the bucket that contains it"""
+        if not self.calls:
+            return 0.0
+
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            'histogram': {
+                **{f"le_{bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)},
+                'inf': self.buckets[-1]
+            }
+        }
+
+class StorageMetrics:
+    """Thread-safe collection of per-method latency stats and engine queue waits
+
+    Calls are recorded on the event loop, while snapshots may be taken from the
+    web server thread, so every access goes through a lock.
+    """
+
+    def __init__(self, slow_query_ms: float = 100):
+        self.slow_query_ms = slow_query_ms
+        self.started = time.time()
+        self._methods: Dict[str, LatencyStats] = {}
+        self._maintenance: Dict[str, LatencyStats] = {}
+        self._queue_waits: Dict[str, LatencyStats] = {}
+        self._slow_queries = 0
+        self._lock = threading.Lock()
+
+    def record(self, method: str, elapsed_ms: float, rows: Optional[int] = None, error: bool = False):
+        maintenance = method in MAINTENANCE_METHODS
+        with self._lock:
+            table = self._maintenance if maintenance else self._methods
+            stats = table.get(method)
+            if stats is None:
+                stats = table[method] = LatencyStats()
+            stats.record(elapsed_ms, rows, error)
+            if not maintenance and elapsed_ms >= self.slow_query_ms:
+                self._slow_queries += 1
+
+    def record_queue_wait(self, kind: str, elapsed_ms: float):
+        """Record time a call spent waiting for the engine (writer lock, group commit, reader pool)"""
+        with self._lock:
+            stats = self._queue_waits.get(kind)
+            if stats is None:
+                stats = self._queue_waits[kind] = LatencyStats()
+            stats.record(elapsed_ms)
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self._maintenance.clear()
+            self._queue_waits.clear()
+            self._slow_queries = 0
+            self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy the current counters into plain dicts safe to serialize from any thread"""
+        with self._lock:
+            return {
+                'since': self.started,
+                'slow_query_ms': self.slow_query_ms,
+                'slow_queries': self._slow_queries,
+                'methods': {name: stats.to_dict() for name, stats in sorted(self._methods.items())},
+                'maintenance': {name: stats.to_dict() for name, stats in sorted(self._maintenance.items())},
+                'queue_wait': {kind: stats.to_dict() for kind, stats in sorted(self._queue_waits.items())}
+            }
+
+class InstrumentedStorage:
+    """Wraps a storage engine and times every public coroutine and async generator
+
+    Attribute access is forwarded to the wrapped engine, so the wrapper satisfies
+    the Storage protocol and exposes engine-specific extras (e.g. backup_to).
+    Engines with a wait_observer hook also report their internal queue waits.
+    """
+
+    def __init__(self, storage, slow_query_ms: float = 100):
+        self.storage = storage
+        self.metrics = StorageMetrics(slow_query_ms)
+        self._wrapped: Dict[str, Any] = {}
+
+        if hasattr(storage, 'wait_observer'):
+            storage.wait_observer = self.metrics.record_queue_wait
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.storage, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            if inspect.isasyncgenfunction(attribute):
+                wrapped = self._wrap_generator(name)
+            elif inspect.iscoroutinefunction(attribute):
+                wrapped = self._wrap_coroutine(name)
+            else:
+                return attribute
+            self._wrapped[name] = wrapped
+        return wrapped
+
+    def _wrap_coroutine(self, name: str):
+        method = getattr(self.storage, name)
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            return await self._timed_call(name, method, args, kwargs)
+
+        return wrapper
+
+    def _wrap_generator(self, name: str):
+        method = getattr(self.storage, name)
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            # Only time spent waiting on the engine counts, not the consumer's work between chunks
+            elapsed = 0.0
+            rows = 0
+            error = False
+            generator = method(*args, **kwargs)
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        chunk = await generator.__anext__()
+                    except StopAsyncIteration:
+                        elapsed += time.perf_counter() - started
+                        break
+                    elapsed += time.perf_counter() - started
+                    rows += len(chunk)
+                    yield chunk
+            except Exception:
+                error = True
+                raise
+            finally:
+                await generator.aclose()
+                self._finish(name, elapsed * 1000, rows, error, args, kwargs)
+
+        return wrapper
+
+    async def _timed_call(self, name: str, method, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception:
+            self._finish(name, (time.perf_counter() - started) * 1000, None, True, args, kwargs)
+            raise
+
+        self._finish(name, (time.perf_counter() - started) * 1000, _row_count(result), False, args, kwargs)
+        return result
+
+    def _finish(self, name: str, elapsed_ms: float, rows: Optional[int], error: bool,
+                args: tuple, kwargs: Dict[str, Any]):
+        self.metrics.record(name, elapsed_ms, rows, error)
+
+        if name not in MAINTENANCE_METHODS and elapsed_ms >= self.metrics.slow_query_ms:
+            logging.warning(
+                f"Slow storage call {name}{parameters_shape(args, kwargs)} took {elapsed_ms:.1f}ms"
+                f" ({rows if rows is not None else '?'} rows)"
+            )
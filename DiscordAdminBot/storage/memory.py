@@ -0,0 +1,541 @@
+import bisect
+import copy
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from database import HISTORY_TABLES, RESUMABLE_JOB_STATUSES, to_epoch, utc_text
+
+class MemoryStorage:
+    """RAM-only storage engine with the same behaviour as the SQLite Database
+
+    Nothing is persisted, so it suits tests, benchmarks and ephemeral shards.
+    Rows live in per-table dicts keyed by id, with secondary indexes for the
+    lookups the cogs make.
+    """
+
+    def __init__(self):
+        self.archive_path = None
+
+        self._warnings: Dict[int, Dict[str, Any]] = {}
+        self._mutes: Dict[int, Dict[str, Any]] = {}
+        self._mod_logs: Dict[int, Dict[str, Any]] = {}
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        self._next_ids = {'warnings': 1, 'mutes': 1, 'mod_logs': 1, 'jobs': 1, 'permission_snapshots': 1}
+
+        # Secondary indexes; id lists are always in ascending order
+        self._warnings_by_member: Dict[Tuple[int, int], List[int]] = {}
+        self._mutes_by_member: Dict[Tuple[int, int], List[int]] = {}
+        self._mod_logs_by_guild: Dict[int, List[int]] = {}
+        self._guild_ids: Dict[str, Dict[int, List[int]]] = {'warnings': {}, 'mutes': {}}
+
+        # Active warnings per (guild_id, user_id), like the warning_counts table
+        self._active_warnings: Counter = Counter()
+
+        # Daily rollup counts keyed by (guild_id, day, moderator_id, action_type)
+        self._daily: Counter = Counter()
+
+        # Lockdown snapshots keyed by guild ID, then channel ID
+        self._lockdowns: Dict[int, Dict[int, Dict[str, Any]]] = {}
+
+        # Permission snapshots keyed by ID, including their encoded data
+        self._permission_snapshots: Dict[int, Dict[str, Any]] = {}
+
+        self._settings: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def history_tables(self) -> List[str]:
+        return [table for table in HISTORY_TABLES if not table.startswith('archive.')]
+
+    async def initialize(self):
+        logging.info("In-memory storage initialized")
+
+    async def close(self):
+        pass
+
+    async def ping(self):
+        pass
+
+    def _allocate_ids(self, table: str, count: int) -> range:
+        first = self._next_ids[table]
+        self._next_ids[table] = first + count
+        return range(first, first + count)
+
+    # Warning system methods
+    async def add_warning(self, guild_id: int, user_id: int, moderator_id: int, reason: str) -> int:
+        """Add a warning"""
+        return (await self.add_warnings_bulk([(guild_id, user_id, moderator_id, reason)]))[0]
+
+    async def add_warnings_bulk(self, warnings: Iterable[Tuple[int, int, int, str]]) -> range:
+        """Add (guild_id, user_id, moderator_id, reason) warnings"""
+        rows = list(warnings)
+        now = int(time.time())
+        ids = self._allocate_ids('warnings', len(rows))
+
+        for warning_id, (guild_id, user_id, moderator_id, reason) in zip(ids, rows):
+            self._warnings[warning_id] = {
+                'id': warning_id,
+                'guild_id': guild_id,
+                'user_id': user_id,
+                'moderator_id': moderator_id,
+                'reason': reason,
+                'timestamp': utc_text(now),
+                'timestamp_epoch': now,
+                'active': 1
+            }
+            self._warnings_by_member.setdefault((guild_id, user_id), []).append(warning_id)
+            self._active_warnings[(guild_id, user_id)] += 1
+            self._guild_ids['warnings'].setdefault(guild_id, []).append(warning_id)
+
+        return ids
+
+    async def get_warnings(self, guild_id: int, user_id: int, limit: int = None) -> List[Dict[str, Any]]:
+        """Get warnings for a user, newest first, optionally limited to the most recent ones"""
+        ids = self._warnings_by_member.get((guild_id, user_id), [])
+        newest = ids[::-1] if limit is None else ids[:-limit - 1:-1] if limit > 0 else []
+        return [dict(self._warnings[warning_id]) for warning_id in newest]
+
+    async def clear_warnings(self, guild_id: int, user_id: int) -> int:
+        """Clear all warnings for a user"""
+        ids = self._warnings_by_member.pop((guild_id, user_id), [])
+        self._active_warnings.pop((guild_id, user_id), None)
+        for warning_id in ids:
+            del self._warnings[warning_id]
+
+        if ids:
+            removed = set(ids)
+            guild_ids = self._guild_ids['warnings'][guild_id]
+            guild_ids[:] = [warning_id for warning_id in guild_ids if warning_id not in removed]
+        return len(ids)
+
+    async def get_warning_count(self, guild_id: int, user_id: int) -> int:
+        """Get active warning count for a user"""
+        return self._active_warnings.get((guild_id, user_id), 0)
+
+    async def count_warnings_since(self, guild_id: int, user_id: int, since: datetime) -> int:
+        """Count a user's active warnings issued at or after since"""
+        since_epoch = to_epoch(since)
+        count = 0
+        # IDs are allocated in time order, so stop at the first older warning
+        for warning_id in reversed(self._warnings_by_member.get((guild_id, user_id), [])):
+            warning = self._warnings[warning_id]
+            if warning['timestamp_epoch'] < since_epoch:
+                break
+            count += warning['active']
+        return count
+
+    async def expire_warnings(self, guild_id: int, older_than: datetime, batch_size: int = 1000) -> int:
+        """Deactivate up to batch_size of a guild's active warnings issued before older_than"""
+        cutoff = to_epoch(older_than)
+        expired = 0
+        for warning_id in self._guild_ids['warnings'].get(guild_id, []):
+            if expired >= batch_size:
+                break
+            warning = self._warnings[warning_id]
+            if warning['timestamp_epoch'] >= cutoff:
+                break
+            if warning['active']:
+                warning['active'] = 0
+                key = (guild_id, warning['user_id'])
+                self._active_warnings[key] -= 1
+                if self._active_warnings[key] <= 0:
+                    del self._active_warnings[key]
+                expired += 1
+        return expired
+
+    # Mute system methods
+    async def add_mute(self, guild_id: int, user_id: int, moderator_id: int, reason: str, duration: timedelta = None) -> int:
+        """Add a mute"""
+        return (await self.add_mutes_bulk([(guild_id, user_id, moderator_id, reason, duration)]))[0]
+
+    async def add_mutes_bulk(self, mutes: Iterable[Tuple[int, int, int, str, Optional[timedelta]]]) -> range:
+        """Add (guild_id, user_id, moderator_id, reason, duration) mutes"""
+        rows = list(mutes)
+        now = int(time.time())
+        ids = self._allocate_ids('mutes', len(rows))
+
+        for mute_id, (guild_id, user_id, moderator_id, reason, duration) in zip(ids, rows):
+            end_epoch = now + int(duration.total_seconds()) if duration else None
+            self._mutes[mute_id] = {
+                'id': mute_id,
+                'guild_id': guild_id,
+                'user_id': user_id,
+                'moderator_id': moderator_id,
+                'reason': reason,
+                'start_time': utc_text(now),
+                'end_time': utc_text(end_epoch) if end_epoch else None,
+                'active': 1,
+                'start_epoch': now,
+                'end_epoch': end_epoch
+            }
+            self._mutes_by_member.setdefault((guild_id, user_id), []).append(mute_id)
+            self._guild_ids['mutes'].setdefault(guild_id, []).append(mute_id)
+
+        return ids
+
+    async def remove_mute(self, guild_id: int, user_id: int) -> bool:
+        """Remove active mute for a user"""
+        removed = False
+        for mute_id in self._mutes_by_member.get((guild_id, user_id), []):
+            mute = self._mutes[mute_id]
+            if mute['active']:
+                mute['active'] = 0
+                removed = True
+        return removed
+
+    async def remove_mutes(self, mute_ids: Iterable[int]) -> int:
+        """Deactivate a batch of mutes by ID"""
+        count = 0
+        for mute_id in mute_ids:
+            mute = self._mutes.get(mute_id)
+            if mute and mute['active']:
+                mute['active'] = 0
+                count += 1
+        return count
+
+    async def get_active_mute(self, guild_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get active mute for a user"""
+        for mute_id in reversed(self._mutes_by_member.get((guild_id, user_id), [])):
+            mute = self._mutes[mute_id]
+            if mute['active']:
+                return dict(mute)
+        return None
+
+    async def get_expired_mutes(self) -> List[Dict[str, Any]]:
+        """Get all expired mutes that are still active"""
+        now = int(time.time())
+        return [
+            dict(mute) for mute in self._mutes.values()
+            if mute['active'] and mute['end_epoch'] is not None and mute['end_epoch'] <= now
+        ]
+
+    async def get_pending_mutes(self) -> List[Dict[str, Any]]:
+        """Get all active mutes that have an end time"""
+        return [
+            {'id': mute['id'], 'guild_id': mute['guild_id'], 'user_id': mute['user_id'], 'end_epoch': mute['end_epoch']}
+            for mute in self._mutes.values()
+            if mute['active'] and mute['end_epoch'] is not None
+        ]
+
+    # Moderation logs methods
+    async def log_action(self, guild_id: int, action_type: str, moderator_id: int, target_id: int = None, reason: str = None, details: str = None):
+        """Log a moderation action"""
+        await self.log_actions_bulk([(guild_id, action_type, moderator_id, target_id, reason, details)])
+
+    async def log_actions_bulk(self, actions: Iterable[Tuple[int, str, int, Optional[int], Optional[str], Optional[str]]]) -> range:
+        """Log (guild_id, action_type, moderator_id, target_id, reason, details) actions"""
+        rows = list(actions)
+        now = int(time.time())
+        ids = self._allocate_ids('mod_logs', len(rows))
+
+        for log_id, (guild_id, action_type, moderator_id, target_id, reason, details) in zip(ids, rows):
+            self._mod_logs[log_id] = {
+                'id': log_id,
+                'guild_id': guild_id,
+                'action_type': action_type,
+                'moderator_id': moderator_id,
+                'target_id': target_id,
+                'reason': reason,
+                'details': details,
+                'timestamp': utc_text(now),
+                'timestamp_epoch': now
+            }
+            self._mod_logs_by_guild.setdefault(guild_id, []).append(log_id)
+            self._daily[(guild_id, now // 86400, moderator_id, action_type)] += 1
+
+        return ids
+
+    async def get_mod_logs(self, guild_id: int, moderator_id: int = None, target_id: int = None,
+                           action_type: str = None, since: datetime = None, until: datetime = None,
+                           before_id: int = None, limit: int = 10,
+                           include_archived: bool = False) -> List[Dict[str, Any]]:
+        """Get a page of moderation logs, newest first, using keyset pagination on id"""
+        ids = self._mod_logs_by_guild.get(guild_id, [])
+        end = bisect.bisect_left(ids, before_id) if before_id is not None else len(ids)
+        since_epoch = to_epoch(since) if since is not None else None
+        until_epoch = to_epoch(until) if until is not None else None
+
+        results = []
+        for index in range(end - 1, -1, -1):
+            if len(results) >= limit:
+                break
+
+            row = self._mod_logs[ids[index]]
+            if moderator_id is not None and row['moderator_id'] != moderator_id:
+                continue
+            if target_id is not None and row['target_id'] != target_id:
+                continue
+            if action_type is not None and row['action_type'] != action_type:
+                continue
+            if since_epoch is not None and row['timestamp_epoch'] < since_epoch:
+                continue
+            if until_epoch is not None and row['timestamp_epoch'] >= until_epoch:
+                continue
+            results.append(dict(row))
+
+        return results
+
+    async def archive_mod_logs(self, guild_id: int, older_than: datetime, batch_size: int = 1000) -> int:
+        """No archive exists in memory, so nothing is ever moved"""
+        return 0
+
+    async def search_mod_history(self, guild_id: int, query: str, since: datetime = None,
+                                 limit: int = 500) -> List[Tuple[str, int]]:
+        """Search warning and moderation log text for rows containing every query term
+
+        Returns ranked (source, id) keys like the SQLite engine. Scores are negated
+        term-hit counts divided by the text length so that, as with bm25, lower is
+        better and shorter matches rank first.
+        """
+        terms = [term.lower() for term in query.replace('"', ' ').split()]
+        if not terms:
+            return []
+
+        since_epoch = to_epoch(since) if since is not None else None
+        scored = []
+        for source, row in self._history_rows(guild_id):
+            if since_epoch is not None and row['timestamp_epoch'] < since_epoch:
+                continue
+
+            words = f"{row['reason'] or ''} {row['details'] or ''}".lower().split()
+            hits = [words.count(term) for term in terms]
+            if not all(hits):
+                continue
+
+            scored.append((-sum(hits) / len(words), source, row['id']))
+
+        scored.sort()
+        return [(source, row_id) for _, source, row_id in scored[:limit]]
+
+    async def get_mod_history_entries(self, keys: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """Get the warnings and moderation logs for (source, id) keys, in key order"""
+        results = []
+        for source, row_id in keys:
+            if source == 'warning':
+                warning = self._warnings.get(row_id)
+                entry = self._warning_as_history(warning) if warning else None
+            else:
+                entry = dict(self._mod_logs[row_id]) if row_id in self._mod_logs else None
+            if entry is not None:
+                entry['source'] = source
+                results.append(entry)
+        return results
+
+    def _history_rows(self, guild_id: int):
+        for warning_id in self._guild_ids['warnings'].get(guild_id, []):
+            yield 'warning', self._warning_as_history(self._warnings[warning_id])
+        for log_id in self._mod_logs_by_guild.get(guild_id, []):
+            yield 'mod_log', self._mod_logs[log_id]
+
+    @staticmethod
+    def _warning_as_history(warning: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': warning['id'],
+            'guild_id': warning['guild_id'],
+            'action_type': 'Warning',
+            'moderator_id': warning['moderator_id'],
+            'target_id': warning['user_id'],
+            'reason': warning['reason'],
+            'details': None,
+            'timestamp': warning['timestamp'],
+            'timestamp_epoch': warning['timestamp_epoch']
+        }
+
+    # Moderation analytics methods
+    async def get_mod_stats(self, guild_id: int, since: datetime = None,
+                            moderator_id: int = None) -> List[Dict[str, Any]]:
+        """Get daily rollup rows (day, moderator_id, action_type, count) for a guild"""
+        since_day = to_epoch(since) // 86400 if since is not None else None
+        return [
+            {'day': day, 'moderator_id': moderator, 'action_type': action_type, 'count': count}
+            for (guild, day, moderator, action_type), count in self._daily.items()
+            if guild == guild_id
+            and (since_day is None or day >= since_day)
+            and (moderator_id is None or moderator == moderator_id)
+        ]
+
+    async def rebuild_mod_stats(self, guild_id: int = None) -> int:
+        """Recompute daily rollups from the stored logs, for one guild or all"""
+        for key in [key for key in self._daily if guild_id is None or key[0] == guild_id]:
+            del self._daily[key]
+
+        rebuilt = Counter(
+            (row['guild_id'], row['timestamp_epoch'] // 86400, row['moderator_id'], row['action_type'])
+            for row in self._mod_logs.values()
+            if guild_id is None or row['guild_id'] == guild_id
+        )
+        self._daily.update(rebuilt)
+        return len(rebuilt)
+
+    # Background job methods
+    async def create_job(self, guild_id: int, job_type: str, params: Dict[str, Any],
+                         created_by: int, total: int = 0, channel_id: int = None) -> int:
+        """Record a new pending job and return its ID"""
+        job_id = self._allocate_ids('jobs', 1)[0]
+        now = int(time.time())
+        self._jobs[job_id] = {
+            'id': job_id,
+            'guild_id': guild_id,
+            'job_type': job_type,
+            'params': copy.deepcopy(params),
+            'cursor': None,
+            'status': 'pending',
+            'total': total,
+            'processed': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'created_by': created_by,
+            'created_epoch': now,
+            'updated_epoch': now,
+            'error': None,
+            'channel_id': channel_id,
+            'message_id': None
+        }
+        return job_id
+
+    async def set_job_message(self, job_id: int, message_id: int):
+        """Record the channel message a job reports its progress on"""
+        job = self._jobs.get(job_id)
+        if job:
+            job['message_id'] = message_id
+
+    async def update_job_progress(self, job_id: int, cursor: Any, processed: int, succeeded: int, failed: int):
+        """Checkpoint a job's cursor and progress counters"""
+        job = self._jobs.get(job_id)
+        if job:
+            job.update(cursor=copy.deepcopy(cursor), processed=processed, succeeded=succeeded,
+                       failed=failed, updated_epoch=int(time.time()))
+
+    async def set_job_status(self, job_id: int, status: str, error: str = None):
+        """Move a job to a new status"""
+        job = self._jobs.get(job_id)
+        if job:
+            job.update(status=status, error=error, updated_epoch=int(time.time()))
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job by ID"""
+        job = self._jobs.get(job_id)
+        return copy.deepcopy(job) if job else None
+
+    async def get_jobs(self, guild_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get a guild's most recent jobs, newest first"""
+        jobs = [job for job in reversed(self._jobs.values()) if job['guild_id'] == guild_id]
+        return copy.deepcopy(jobs[:limit])
+
+    async def get_resumable_jobs(self) -> List[Dict[str, Any]]:
+        """Get every job that is still pending or running"""
+        return copy.deepcopy([job for job in self._jobs.values() if job['status'] in RESUMABLE_JOB_STATUSES])
+
+    # Lockdown snapshot methods
+    async def save_lockdown_channels(self, guild_id: int, channels: Iterable[Tuple[int, Optional[bool]]], locked_by: int) -> int:
+        """Record (channel_id, original_send_messages) pairs, keeping existing snapshots"""
+        now = int(time.time())
+        locked = self._lockdowns.setdefault(guild_id, {})
+        saved = 0
+        for channel_id, original in channels:
+            if channel_id not in locked:
+                locked[channel_id] = {'original_send_messages': original, 'locked_by': locked_by, 'locked_epoch': now}
+                saved += 1
+        return saved
+
+    async def get_lockdown_channels(self, guild_id: int) -> Dict[int, Dict[str, Any]]:
+        """Get a guild's locked channels keyed by channel ID"""
+        return copy.deepcopy(self._lockdowns.get(guild_id, {}))
+
+    async def remove_lockdown_channels(self, guild_id: int, channel_ids: Iterable[int]) -> int:
+        """Forget the snapshots of channels that were unlocked"""
+        locked = self._lockdowns.get(guild_id, {})
+        return sum(locked.pop(channel_id, None) is not None for channel_id in channel_ids)
+
+    # Permission snapshot methods
+    async def create_permission_snapshot(self, guild_id: int, name: str, created_by: int, data: bytes,
+                                         channel_count: int, role_count: int) -> int:
+        """Store an encoded permission snapshot and return its ID"""
+        snapshot_id = self._allocate_ids('permission_snapshots', 1)[0]
+        self._permission_snapshots[snapshot_id] = {
+            'id': snapshot_id,
+            'guild_id': guild_id,
+            'name': name,
+            'created_by': created_by,
+            'created_epoch': int(time.time()),
+            'channel_count': channel_count,
+            'role_count': role_count,
+            'size': len(data),
+            'data': bytes(data)
+        }
+        return snapshot_id
+
+    async def get_permission_snapshots(self, guild_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get a guild's most recent snapshots without their data, newest first"""
+        snapshots = [
+            {key: value for key, value in snapshot.items() if key != 'data'}
+            for snapshot in reversed(self._permission_snapshots.values())
+            if snapshot['guild_id'] == guild_id
+        ]
+        return snapshots[:limit]
+
+    async def get_permission_snapshot(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """Get a snapshot by ID, including its encoded data"""
+        snapshot = self._permission_snapshots.get(snapshot_id)
+        return dict(snapshot) if snapshot else None
+
+    async def delete_permission_snapshot(self, snapshot_id: int) -> bool:
+        """Delete a snapshot by ID"""
+        return self._permission_snapshots.pop(snapshot_id, None) is not None
+
+    # Export methods
+    async def iter_guild_history(self, guild_id: int, table: str,
+                                 chunk_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield a guild's rows from a history table in id order, chunk_size rows at a time"""
+        if table == 'mod_logs':
+            ids, rows = self._mod_logs_by_guild.get(guild_id, []), self._mod_logs
+        else:
+            ids, rows = self._guild_ids[table].get(guild_id, []), getattr(self, f"_{table}")
+
+        for start in range(0, len(ids), chunk_size):
+            yield [dict(rows[row_id]) for row_id in ids[start:start + chunk_size]]
+
+    # Guild settings methods
+    def _guild_settings(self, guild_id: int) -> Dict[str, Any]:
+        return self._settings.setdefault(guild_id, {'mod_log_channel': None, 'mute_role_id': None, 'settings': {}})
+
+    async def setup_guild(self, guild_id: int):
+        """Initialize guild settings"""
+        self._guild_settings(guild_id)
+
+    async def get_guild_setting(self, guild_id: int, key: str, default: Any = None) -> Any:
+        """Get a per-guild setting"""
+        return self._guild_settings(guild_id)['settings'].get(key, default)
+
+    async def set_guild_setting(self, guild_id: int, key: str, value: Any):
+        """Set a per-guild setting; None removes it"""
+        settings = self._guild_settings(guild_id)['settings']
+        if value is None:
+            settings.pop(key, None)
+        else:
+            settings[key] = value
+
+    def guilds_with_setting(self, key: str) -> Dict[int, Any]:
+        """Get every guild that has a setting key set"""
+        return {
+            guild_id: settings['settings'][key]
+            for guild_id, settings in self._settings.items()
+            if settings['settings'].get(key) is not None
+        }
+
+    async def set_mod_log_channel(self, guild_id: int, channel_id: int):
+        """Set moderation log channel for a guild"""
+        self._guild_settings(guild_id)['mod_log_channel'] = channel_id
+
+    async def get_mod_log_channel(self, guild_id: int) -> Optional[int]:
+        """Get moderation log channel for a guild"""
+        return self._guild_settings(guild_id)['mod_log_channel'] or None
+
+    async def set_mute_role(self, guild_id: int, role_id: int):
+        """Set mute role for a guild"""
+        self._guild_settings(guild_id)['mute_role_id'] = role_id
+
+    async def get_mute_role(self, guild_id: int) -> Optional[int]:
+        """Get mute role for a guild"""
+        return self._guild_settings(guild_id)['mute_role_id'] or None
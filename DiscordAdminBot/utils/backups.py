@@ -0,0 +1,52 @@
+import asyncio
+import glob
+import logging
+import os
+import time
+from typing import List, Optional
+
+BACKUP_PREFIX = "admin_bot"
+ARCHIVE_PREFIX = "admin_bot_archive"
+
+def _rotate(directory: str, prefix: str, generations: int) -> List[str]:
+    """Delete all but the newest generations backups for a prefix and return the removed paths"""
+    # Timestamped names sort chronologically
+    backups = sorted(glob.glob(os.path.join(directory, f"{prefix}-*.db")))
+    expired = backups[:-generations] if generations > 0 else []
+    for path in expired:
+        os.remove(path)
+    return expired
+
+async def _backup_one(db, directory: str, prefix: str, stamp: str, generations: int,
+                      pages_per_step: int, source_path: Optional[str] = None) -> str:
+    path = os.path.join(directory, f"{prefix}-{stamp}.db")
+    started = time.perf_counter()
+
+    result = await db.backup_to(path, pages_per_step=pages_per_step, source_path=source_path)
+    if result != "ok":
+        await asyncio.to_thread(os.remove, path)
+        raise RuntimeError(f"Backup {path} failed integrity check: {result}")
+
+    expired = await asyncio.to_thread(_rotate, directory, prefix, generations)
+    logging.info(
+        f"Backed up {source_path or db.db_path} to {path} in {time.perf_counter() - started:.2f}s"
+        f" (removed {len(expired)} old generations)"
+    )
+    return path
+
+async def create_backup(db, directory: str = "backups", generations: int = 7, pages_per_step: int = 256) -> List[str]:
+    """Back up the live database (and archive, if attached) and keep the newest generations
+
+    Each copy is verified with PRAGMA integrity_check; a copy that fails is
+    deleted and never counts towards the rotation. Returns the new backup paths.
+    """
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+
+    paths = [await _backup_one(db, directory, BACKUP_PREFIX, stamp, generations, pages_per_step)]
+    if db.archive_path and os.path.exists(db.archive_path):
+        paths.append(await _backup_one(
+            db, directory, ARCHIVE_PREFIX, stamp, generations, pages_per_step,
+            source_path=db.archive_path
+        ))
+    return paths
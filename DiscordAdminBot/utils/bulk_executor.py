@@ -0,0 +1,329 @@
+import discord
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+# discord.py waits out rate limits inside the call, so calls slower than this are
+# the usual sign of a rate-limit bucket and back off the same way an explicit 429 does
+SLOW_CALL_SECONDS = 2.0
+MAX_RATE_LIMIT_RETRIES = 3
+# Wait used when a 429 doesn't say how long to back off
+DEFAULT_RETRY_AFTER = 1.0
+
+def retry_after(error: discord.HTTPException) -> float:
+    """Seconds Discord asked us to wait before retrying, from the 429's Retry-After header"""
+    headers = getattr(error.response, 'headers', None) or {}
+    try:
+        return max(0.0, float(headers.get('Retry-After', DEFAULT_RETRY_AFTER)))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+async def fan_out(items: Iterable[Any], action: Callable[[Any], Awaitable[Any]], concurrency: int = 10,
+                  cancelled: asyncio.Event = None) -> Tuple[List[Any], List[Any], List[Any]]:
+    """Run action for every item with at most concurrency calls in flight
+
+    Returns (succeeded, failed, skipped) item lists; items are skipped when
+    cancelled is set before their call starts. Unlike BulkExecutor there is no
+    progress message or backoff, which suits a few hundred channel or role edits.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    succeeded, failed, skipped = [], [], []
+
+    async def run(item):
+        async with semaphore:
+            if cancelled and cancelled.is_set():
+                skipped.append(item)
+                return
+            try:
+                await action(item)
+                succeeded.append(item)
+            except Exception as e:
+                logging.debug(f"Edit failed for {item}: {e}")
+                failed.append(item)
+
+    await asyncio.gather(*(run(item) for item in items))
+    return succeeded, failed, skipped
+
+class AdaptiveLimiter:
+    """Concurrency limit that grows additively on success and halves on rate limits (AIMD)"""
+
+    def __init__(self, initial: int, maximum: int):
+        self.maximum = max(1, maximum)
+        self.limit = max(1, min(initial, self.maximum))
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        # One extra slot after a full window of successes at the current limit
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttled(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+class BulkCancelView(discord.ui.View):
+    """Cancel button for a running bulk operation, usable only by the moderator who started it"""
+
+    def __init__(self, author_id: int, cancelled: asyncio.Event):
+        super().__init__(timeout=None)
+        self.author_id = author_id
+        self.cancelled = cancelled
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the moderator who started this operation can cancel it.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Cancel", emoji="🛑", style=discord.ButtonStyle.danger)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cancelled.set()
+        button.disabled = True
+        await interaction.response.edit_message(view=self)
+
+class ProgressMessage:
+    """A bot message in a channel that is posted on the first update and edited after that
+
+    Interaction followups stop working when the interaction token expires after
+    15 minutes, so long runs report through a regular channel message instead.
+    """
+
+    def __init__(self, channel: discord.abc.Messageable, message_id: int = None,
+                 on_posted: Callable[[discord.Message], Awaitable[None]] = None):
+        self.channel = channel
+        self.message_id = message_id
+        self.on_posted = on_posted
+
+    async def show(self, embed: discord.Embed, view: Optional[discord.ui.View] = None):
+        if self.message_id:
+            try:
+                await self.channel.get_partial_message(self.message_id).edit(embed=embed, view=view)
+                return
+            except discord.NotFound:
+                # Deleted by someone; post a fresh one below
+                self.message_id = None
+
+        message = await self.channel.send(embed=embed, view=view)
+        self.message_id = message.id
+        if self.on_posted:
+            await self.on_posted(message)
+
+class BulkResult:
+    """Outcome of a bulk run"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.succeeded: List[Any] = []
+        self.failed = 0
+        self.cancelled = False
+        self.elapsed = 0.0
+
+        # Last item before which every item has finished; safe to resume after
+        self.checkpoint_item: Any = None
+
+    @property
+    def processed(self) -> int:
+        return len(self.succeeded) + self.failed
+
+    @property
+    def rate(self) -> float:
+        """Items processed per second"""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+class BulkExecutor:
+    """Runs one Discord API call per item with adaptive concurrency and live progress
+
+    Up to max_concurrency workers pull items from a shared queue, gated by an
+    AIMD limiter: every window of fast successes allows one more concurrent call,
+    while a 429 (or a call slow enough that discord.py must have waited on a
+    rate-limit bucket) halves the limit. A progress message is edited every
+    progress_interval seconds and carries a cancel button.
+
+    If a checkpoint callback is given it is awaited on the same interval and at
+    the end with the result; result.checkpoint_item is the last item before which
+    every item has finished, so a resumed run can skip everything up to it.
+    """
+
+    def __init__(self, action: Callable[[Any], Awaitable[Any]], title: str,
+                 initial_concurrency: int = 2, max_concurrency: int = 8,
+                 progress_interval: float = 5.0, unit: str = "items"):
+        self.action = action
+        self.title = title
+        # What an item is (e.g. "members", "channels"), for the throughput line
+        self.unit = unit
+        self.limiter = AdaptiveLimiter(initial_concurrency, max_concurrency)
+        self.progress_interval = progress_interval
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def run(self, items: Iterable[Any], progress: ProgressMessage = None, author_id: int = None,
+                  cancelled: asyncio.Event = None,
+                  checkpoint: Callable[[BulkResult], Awaitable[None]] = None) -> BulkResult:
+        """Process every item, reporting progress on the given message if any
+
+        author_id is the only user allowed to press the progress message's cancel button.
+        """
+        items = list(items)
+        queue: asyncio.Queue = asyncio.Queue()
+        # Entries are (index, attempts, monotonic time before which the item mustn't be retried)
+        for index in range(len(items)):
+            queue.put_nowait((index, 0, 0.0))
+
+        result = BulkResult(len(items))
+        cancelled = cancelled or asyncio.Event()
+        finished = [False] * len(items)
+        watermark = 0
+
+        def mark_finished(index: int):
+            nonlocal watermark
+            finished[index] = True
+            while watermark < len(items) and finished[watermark]:
+                watermark += 1
+            if watermark:
+                result.checkpoint_item = items[watermark - 1]
+
+        view = BulkCancelView(author_id, cancelled) if progress and author_id else None
+
+        async def show(embed: discord.Embed, view: Optional[discord.ui.View]):
+            try:
+                await progress.show(embed, view)
+            except discord.HTTPException as e:
+                # The run itself doesn't depend on the message
+                logging.warning(f"{self.title}: progress update failed: {e}")
+
+        if progress:
+            await show(self.build_embed(result, 0.0), view)
+
+        started = time.perf_counter()
+
+        async def worker():
+            while not cancelled.is_set():
+                try:
+                    index, attempts, retry_at = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                # Rate-limited items wait without holding a concurrency slot
+                delay = retry_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    if cancelled.is_set():
+                        return
+
+                async with self.limiter:
+                    if await self._process(queue, result, items[index], index, attempts):
+                        mark_finished(index)
+
+        async def report_progress():
+            while True:
+                await asyncio.sleep(self.progress_interval)
+                result.elapsed = time.perf_counter() - started
+                if checkpoint:
+                    try:
+                        await checkpoint(result)
+                    except Exception as e:
+                        logging.error(f"{self.title}: checkpoint failed: {e}")
+                if progress:
+                    await show(self.build_embed(result, result.elapsed), view)
+
+        reporter = asyncio.create_task(report_progress()) if progress or checkpoint else None
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.max_concurrency, result.total) or 1)))
+        finally:
+            if reporter:
+                reporter.cancel()
+
+        result.elapsed = time.perf_counter() - started
+        result.cancelled = cancelled.is_set()
+        if checkpoint:
+            await checkpoint(result)
+
+        if progress:
+            if view:
+                view.stop()
+            await show(self.build_embed(result, result.elapsed, finished=True), None)
+
+        logging.info(
+            f"{self.title}: {len(result.succeeded)} succeeded, {result.failed} failed"
+            f"{' (cancelled)' if result.cancelled else ''} in {result.elapsed:.1f}s ({result.rate:.1f}/s)"
+        )
+        return result
+
+    async def _process(self, queue: asyncio.Queue, result: BulkResult, item: Any,
+                       index: int, attempts: int) -> bool:
+        """Run the action for one item; returns False if the item was requeued"""
+        call_started = time.perf_counter()
+        try:
+            await self.action(item)
+        except discord.HTTPException as e:
+            # discord.py sleeps through 429s itself and only raises one once its retries run out
+            if e.status == 429:
+                return self._throttled(queue, result, index, attempts, retry_after(e))
+            result.failed += 1
+            logging.debug(f"{self.title} failed for {item}: {e}")
+            return True
+        except Exception as e:
+            result.failed += 1
+            logging.debug(f"{self.title} failed for {item}: {e}")
+            return True
+
+        result.succeeded.append(item)
+        if time.perf_counter() - call_started > SLOW_CALL_SECONDS:
+            self.limiter.on_throttled()
+        else:
+            self.limiter.on_success()
+        return True
+
+    def _throttled(self, queue: asyncio.Queue, result: BulkResult, index: int,
+                   attempts: int, delay: float) -> bool:
+        """Back off after a rate limit and requeue the item to retry after delay, or fail it after too many retries"""
+        self.limiter.on_throttled()
+        if attempts >= MAX_RATE_LIMIT_RETRIES:
+            result.failed += 1
+            return True
+
+        queue.put_nowait((index, attempts + 1, time.monotonic() + delay))
+        return False
+
+    def build_embed(self, result: BulkResult, elapsed: float, finished: bool = False) -> discord.Embed:
+        rate = result.processed / elapsed if elapsed else 0.0
+        if finished:
+            status = "🛑 Cancelled" if result.cancelled else "✅ Complete"
+            color = 0xFFFF00 if result.cancelled else 0x00FF00
+        else:
+            status = "⏳ Running"
+            color = 0x2F3136
+
+        embed = discord.Embed(
+            title=f"{self.title} • {status}",
+            color=color,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Progress", value=f"{result.processed}/{result.total}", inline=True)
+        embed.add_field(name="Succeeded", value=str(len(result.succeeded)), inline=True)
+        embed.add_field(name="Failed", value=str(result.failed), inline=True)
+        embed.add_field(name="Throughput", value=f"{rate:.1f} {self.unit}/sec", inline=True)
+
+        if finished:
+            embed.add_field(name="Elapsed", value=f"{elapsed:.1f}s", inline=True)
+        else:
+            remaining = result.total - result.processed
+            eta = f"{remaining / rate:.0f}s" if rate else "—"
+            embed.add_field(name="Concurrency", value=str(self.limiter.limit), inline=True)
+            embed.add_field(name="ETA", value=eta, inline=True)
+        return embed
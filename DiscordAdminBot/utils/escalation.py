@@ -0,0 +1,108 @@
+import discord
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from utils.logging_utils import ModerationLogger
+from utils.mute_scheduler import MAX_TIMEOUT_SECONDS
+from utils.permissions import format_duration
+
+ESCALATION_SETTING = "escalation_ladder"
+ESCALATION_ACTIONS = ('timeout', 'kick', 'ban')
+
+def describe_rule(rule: Dict[str, Any]) -> str:
+    window = f" in {rule['days']} days" if rule.get('days') else ""
+    action = f"{format_duration(rule['duration'])} timeout" if rule['action'] == 'timeout' else rule['action']
+    return f"{rule['warnings']} warnings{window} → {action}"
+
+class EscalationEngine:
+    """Applies a guild's warning ladder after each new warning
+
+    A ladder is a list of rules such as {'warnings': 3, 'days': 7, 'action':
+    'timeout', 'duration': 3600}. Guilds without their own ladder fall back to
+    max_warnings/auto_ban_on_max_warnings from the bot config. Rules without a
+    window read the maintained warning_counts row and windowed rules use one
+    indexed range count, so evaluating a warning never scans the history.
+    A rule fires only on the warning that brings its count to the threshold,
+    so later warnings don't repeat an action that was already taken.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = ModerationLogger(bot)
+
+    def default_ladder(self) -> List[Dict[str, Any]]:
+        if not self.bot.config.get('auto_ban_on_max_warnings', False):
+            return []
+        return [{'warnings': self.bot.config.get('max_warnings', 3), 'days': None, 'action': 'ban', 'duration': None}]
+
+    async def get_ladder(self, guild_id: int) -> List[Dict[str, Any]]:
+        ladder = await self.bot.db.get_guild_setting(guild_id, ESCALATION_SETTING)
+        return ladder if ladder is not None else self.default_ladder()
+
+    async def set_ladder(self, guild_id: int, ladder: List[Dict[str, Any]]):
+        ladder = sorted(ladder, key=lambda rule: (rule['warnings'], rule.get('days') or 0))
+        await self.bot.db.set_guild_setting(guild_id, ESCALATION_SETTING, ladder)
+
+    async def evaluate(self, guild: discord.Guild, member: discord.Member,
+                       moderator: discord.abc.User) -> Optional[str]:
+        """Apply the most severe rule the newest warning has just triggered; returns a description of what was done"""
+        ladder = await self.get_ladder(guild.id)
+        if not ladder:
+            return None
+
+        # One count per distinct window; None is the all-time counter
+        counts: Dict[Optional[int], int] = {}
+        matched = None
+        for rule in ladder:
+            days = rule.get('days')
+            if days not in counts:
+                if days:
+                    since = datetime.utcnow() - timedelta(days=days)
+                    counts[days] = await self.bot.db.count_warnings_since(guild.id, member.id, since)
+                else:
+                    counts[days] = await self.bot.db.get_warning_count(guild.id, member.id)
+
+            if counts[days] == rule['warnings'] and (matched is None or self.severity(rule) >= self.severity(matched)):
+                matched = rule
+
+        if matched is None:
+            return None
+        return await self.apply(guild, member, moderator, matched)
+
+    @staticmethod
+    def severity(rule: Dict[str, Any]) -> tuple:
+        return (ESCALATION_ACTIONS.index(rule['action']), rule.get('duration') or 0, rule['warnings'])
+
+    async def apply(self, guild: discord.Guild, member: discord.Member, moderator: discord.abc.User,
+                    rule: Dict[str, Any]) -> Optional[str]:
+        reason = f"Automatic escalation: {describe_rule(rule)}"
+        try:
+            if rule['action'] == 'timeout':
+                duration = timedelta(seconds=min(rule['duration'], MAX_TIMEOUT_SECONDS))
+                end_ts = time.time() + duration.total_seconds()
+                await member.timeout(duration, reason=reason)
+
+                # A longer mute already in place keeps its row and expiry; the timeout lifts itself
+                active = await self.bot.db.get_active_mute(guild.id, member.id)
+                if active is None or (active['end_epoch'] is not None and active['end_epoch'] < end_ts):
+                    await self.bot.db.remove_mute(guild.id, member.id)
+                    mute_id = await self.bot.db.add_mute(guild.id, member.id, guild.me.id, reason, duration)
+                    self.bot.mute_scheduler.schedule(guild.id, member.id, mute_id, end_ts)
+                action_type, result = "Mute", f"timed out for {format_duration(int(duration.total_seconds()))}"
+            elif rule['action'] == 'kick':
+                await member.kick(reason=reason)
+                action_type, result = "Kick", "kicked"
+            else:
+                await guild.ban(member, reason=reason)
+                action_type, result = "Ban", "banned"
+        except discord.HTTPException as e:
+            logging.warning(f"Escalation {rule['action']} failed for {member} in {guild.name}: {e}")
+            return f"❌ Escalation to {rule['action']} failed: {e}"
+
+        await self.logger.log_action(
+            guild, action_type, guild.me, member, reason,
+            details=f"Triggered by warning from {moderator}",
+            color=0xFF0000 if rule['action'] == 'ban' else 0xFF8000
+        )
+        return f"🔺 **{member}** was {result} ({describe_rule(rule)})."
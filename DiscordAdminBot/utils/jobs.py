@@ -0,0 +1,186 @@
+import discord
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+from utils.bulk_executor import ProgressMessage
+
+JOB_STATUS_EMOJI = {
+    'pending': "⏳",
+    'running': "⚙️",
+    'completed': "✅",
+    'cancelled': "🛑",
+    'failed': "❌"
+}
+
+class Job:
+    """A running background job: its stored row plus live cancellation and reporting state"""
+
+    def __init__(self, manager: "JobManager", row: Dict[str, Any],
+                 interaction: Optional[discord.Interaction] = None):
+        self.manager = manager
+        self.id = row['id']
+        self.guild_id = row['guild_id']
+        self.job_type = row['job_type']
+        self.params = row['params']
+        self.cursor = row['cursor']
+        self.total = row['total']
+        self.processed = row['processed']
+        self.succeeded = row['succeeded']
+        self.failed = row['failed']
+        self.created_by = row['created_by']
+
+        # Where progress is reported; stored so a resumed job keeps editing the same message
+        self.channel_id = row.get('channel_id')
+        self.message_id = row.get('message_id')
+
+        # Only set for jobs started in this process; resumed jobs have no interaction
+        self.interaction = interaction
+        self.cancelled = asyncio.Event()
+        self._progress: Optional[ProgressMessage] = None
+
+    @property
+    def resumed(self) -> bool:
+        return self.interaction is None
+
+    async def checkpoint(self, cursor: Any, processed: int, succeeded: int, failed: int):
+        """Persist the cursor and cumulative counters so a restart continues from here"""
+        self.cursor = cursor
+        self.processed = processed
+        self.succeeded = succeeded
+        self.failed = failed
+        await self.manager.bot.db.update_job_progress(self.id, cursor, processed, succeeded, failed)
+
+    def progress_message(self) -> Optional[ProgressMessage]:
+        """The job's progress message, or None if its channel is gone"""
+        if self._progress is None:
+            channel = self.manager.bot.get_channel(self.channel_id) if self.channel_id else None
+            if channel is None:
+                return None
+
+            async def remember(message: discord.Message):
+                self.message_id = message.id
+                await self.manager.bot.db.set_job_message(self.id, message.id)
+
+            self._progress = ProgressMessage(channel, self.message_id, remember)
+        return self._progress
+
+    async def notify(self, embed: discord.Embed):
+        """Post a message such as the completion summary in the job's channel"""
+        progress = self.progress_message()
+        if progress is None:
+            return
+        try:
+            await progress.channel.send(embed=embed)
+        except discord.HTTPException as e:
+            logging.warning(f"Job {self.id}: could not post to its channel: {e}")
+
+JobHandler = Callable[[Job], Awaitable[None]]
+
+class JobManager:
+    """Runs long admin operations as persisted jobs that resume after a restart
+
+    Cogs register a handler per job type and submit jobs instead of looping
+    inside the interaction handler. Handlers receive a Job, skip work up to
+    job.cursor, call job.checkpoint() as they go and stop when job.cancelled
+    is set. They report through job.progress_message() and job.notify(),
+    which post in the channel the job was started from, so resumed jobs can
+    report too.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.handlers: Dict[str, JobHandler] = {}
+        self.running: Dict[int, Job] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._resume_task: Optional[asyncio.Task] = None
+
+    def register(self, job_type: str, handler: JobHandler):
+        self.handlers[job_type] = handler
+
+    async def start(self):
+        """Resume interrupted jobs once the bot is ready and guilds are cached"""
+        self._resume_task = asyncio.create_task(self._resume())
+
+    async def stop(self):
+        """Stop running jobs without changing their status, so they resume on next start"""
+        if self._resume_task:
+            self._resume_task.cancel()
+
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, guild_id: int, job_type: str, params: Dict[str, Any], created_by: int,
+                     total: int = 0, interaction: discord.Interaction = None) -> Job:
+        """Persist a new job and start running it"""
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type {job_type!r}")
+
+        channel_id = interaction.channel_id if interaction else None
+        job_id = await self.bot.db.create_job(guild_id, job_type, params, created_by, total, channel_id)
+        job = Job(self, await self.bot.db.get_job(job_id), interaction)
+        self._launch(job)
+
+        # The followup only acknowledges the command; progress lives on a channel message
+        if interaction:
+            try:
+                await interaction.followup.send(f"⚙️ Started job #{job.id}; progress is posted in this channel.")
+            except discord.HTTPException:
+                pass
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Ask a running job to stop at its next checkpoint"""
+        job = self.running.get(job_id)
+        if job is None:
+            return False
+        job.cancelled.set()
+        return True
+
+    async def _resume(self):
+        await self.bot.wait_until_ready()
+
+        resumed = 0
+        for row in await self.bot.db.get_resumable_jobs():
+            if row['id'] in self.running:
+                continue
+            if row['job_type'] not in self.handlers:
+                await self.bot.db.set_job_status(row['id'], 'failed', f"No handler for job type {row['job_type']}")
+                continue
+            if not self.bot.get_guild(row['guild_id']):
+                await self.bot.db.set_job_status(row['id'], 'failed', "Bot is no longer in this guild")
+                continue
+
+            self._launch(Job(self, row))
+            resumed += 1
+
+        if resumed:
+            logging.info(f"Resumed {resumed} background jobs")
+
+    def _launch(self, job: Job):
+        self.running[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job):
+        db = self.bot.db
+        try:
+            await db.set_job_status(job.id, 'running')
+            await self.handlers[job.job_type](job)
+            await db.set_job_status(job.id, 'cancelled' if job.cancelled.is_set() else 'completed')
+        except asyncio.CancelledError:
+            # Shutdown: leave the job running so it resumes from its checkpoint
+            raise
+        except Exception as e:
+            logging.error(f"Job {job.id} ({job.job_type}) failed: {e}")
+            await db.set_job_status(job.id, 'failed', str(e)[:500])
+        finally:
+            self.running.pop(job.id, None)
+            self._tasks.pop(job.id, None)
+
+    @staticmethod
+    def describe(row: Dict[str, Any]) -> str:
+        """One-line summary of a stored job"""
+        emoji = JOB_STATUS_EMOJI.get(row['status'], "•")
+        progress = f"{row['processed']}/{row['total']}" if row['total'] else str(row['processed'])
+        return f"{emoji} **#{row['id']}** `{row['job_type']}` • {row['status']} • {progress}"
@@ -1,6 +1,6 @@
 import discord
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
 import logging
 
 class ModerationLogger:
@@ -31,6 +31,15 @@ class ModerationLogger:
                 except Exception as e:
                     logging.error(f"Error sending to mod log: {e}")
     
+    async def log_bulk_actions(self, guild: discord.Guild, action_type: str, moderator: discord.Member,
+                               target_ids: Iterable[Optional[int]], reason: Optional[str] = None,
+                               details: Optional[str] = None) -> range:
+        """Record one audit row per target in a single database transaction"""
+        return await self.bot.db.log_actions_bulk(
+            (guild.id, action_type, moderator.id, target_id, reason, details)
+            for target_id in target_ids
+        )
+    
     def create_log_embed(self, action_type: str, moderator: discord.Member, 
                         target: Optional[discord.Member] = None, reason: Optional[str] = None, 
                         details: Optional[str] = None, color: int = 0x2F3136) -> discord.Embed:
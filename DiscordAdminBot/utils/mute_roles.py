@@ -0,0 +1,136 @@
+import discord
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from utils.bulk_executor import fan_out
+from utils.logging_utils import ModerationLogger
+
+# Channel IDs the last provisioning run couldn't patch, retried by the next run
+FAILED_CHANNELS_SETTING = "mute_role_failed_channels"
+
+TEXT_DENIES = {'send_messages': False, 'add_reactions': False}
+VOICE_DENIES = {'speak': False}
+
+def mute_denies(channel: discord.abc.GuildChannel) -> Optional[Dict[str, bool]]:
+    """Permissions the mute role is denied in a channel, or None for channels it isn't applied to"""
+    if isinstance(channel, discord.CategoryChannel):
+        # Categories carry both so that text and voice channels created in them start out denied
+        return {**TEXT_DENIES, **VOICE_DENIES}
+    if isinstance(channel, discord.TextChannel):
+        return TEXT_DENIES
+    if isinstance(channel, discord.VoiceChannel):
+        return VOICE_DENIES
+    return None
+
+def denies(channel: discord.abc.GuildChannel, role: discord.Role, permissions: Dict[str, bool]) -> bool:
+    """Whether the channel's overwrite for role already denies every permission"""
+    overwrite = channel.overwrites_for(role)
+    return all(getattr(overwrite, name) is False for name in permissions)
+
+class MuteRoleProvisioner:
+    """Applies mute role overwrites in the background instead of inside /mute
+
+    Categories are patched first so that channels created in them later start
+    out denied. Editing a category doesn't update its synced children through
+    the API, so every text and voice channel that doesn't already deny the role
+    is patched as well. Edits run with bounded concurrency, and channels that
+    fail are stored so the next run (or /mutesync) retries them. Updates to the
+    stored list hold a per-guild lock so runs and single-channel patches don't
+    overwrite each other's entries.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = ModerationLogger(bot)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def provision(self, guild: discord.Guild, role: discord.Role) -> asyncio.Task:
+        """Start provisioning a guild, or return the run already in progress"""
+        task = self._tasks.get(guild.id)
+        if task is None or task.done():
+            task = self._tasks[guild.id] = asyncio.create_task(self._provision(guild, role))
+        return task
+
+    def _lock(self, guild_id: int) -> asyncio.Lock:
+        lock = self._locks.get(guild_id)
+        if lock is None:
+            lock = self._locks[guild_id] = asyncio.Lock()
+        return lock
+
+    def is_running(self, guild_id: int) -> bool:
+        task = self._tasks.get(guild_id)
+        return task is not None and not task.done()
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def patch_channel(self, channel: discord.abc.GuildChannel, role: discord.Role) -> bool:
+        """Apply the mute overwrite to one new channel; returns False if the edit failed"""
+        permissions = mute_denies(channel)
+        if permissions is None or denies(channel, role, permissions):
+            return True
+
+        try:
+            await channel.set_permissions(role, reason="Mute role setup", **permissions)
+            return True
+        except discord.HTTPException as e:
+            logging.warning(f"Could not apply mute role to #{channel.name} in {channel.guild.name}: {e}")
+            async with self._lock(channel.guild.id):
+                failed = await self.bot.db.get_guild_setting(channel.guild.id, FAILED_CHANNELS_SETTING) or []
+                if channel.id not in failed:
+                    await self.bot.db.set_guild_setting(channel.guild.id, FAILED_CHANNELS_SETTING, failed + [channel.id])
+            return False
+
+    async def _provision(self, guild: discord.Guild, role: discord.Role):
+        concurrency = self.bot.config.get('mute_provision_concurrency', 5)
+        previous = set(await self.bot.db.get_guild_setting(guild.id, FAILED_CHANNELS_SETTING) or [])
+
+        async def apply(channel):
+            await channel.set_permissions(role, reason="Mute role setup", **mute_denies(channel))
+
+        categories = [
+            category for category in guild.categories
+            if not denies(category, role, mute_denies(category))
+        ]
+        patched, failed, _ = await fan_out(categories, apply, concurrency)
+
+        skipped = set()
+        channels: List[discord.abc.GuildChannel] = []
+        for channel in guild.channels:
+            permissions = mute_denies(channel)
+            if permissions is None or isinstance(channel, discord.CategoryChannel):
+                continue
+            if denies(channel, role, permissions):
+                skipped.add(channel.id)
+                continue
+            channels.append(channel)
+
+        channel_patched, channel_failed, _ = await fan_out(channels, apply, concurrency)
+        patched += channel_patched
+        failed += channel_failed
+
+        async with self._lock(guild.id):
+            # Keep failures patch_channel recorded during this run unless the run fixed those channels
+            settled = skipped | {channel.id for channel in patched}
+            failed_ids = [channel.id for channel in failed]
+            stored = await self.bot.db.get_guild_setting(guild.id, FAILED_CHANNELS_SETTING) or []
+            failed_ids += [
+                channel_id for channel_id in stored
+                if channel_id not in previous and channel_id not in settled and channel_id not in failed_ids
+            ]
+            await self.bot.db.set_guild_setting(guild.id, FAILED_CHANNELS_SETTING, failed_ids or None)
+
+        logging.info(
+            f"Mute role provisioning in {guild.name}: {len(patched)} patched, {len(skipped)} skipped, {len(failed)} failed"
+        )
+
+        if failed:
+            await self.logger.log_action(
+                guild, "Mute Role Setup", guild.me,
+                details=f"Patched: {len(patched)} channels\nSkipped: {len(skipped)} channels\nFailed: {', '.join(f'#{channel.name}' for channel in failed[:25])}",
+                color=0xFFFF00
+            )
@@ -0,0 +1,193 @@
+import discord
+import asyncio
+import heapq
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from utils.logging_utils import ModerationLogger
+
+MUTE_BACKEND_SETTING = "mute_backend"
+MUTE_BACKENDS = ('role', 'timeout')
+
+# Discord rejects member timeouts longer than 28 days
+MAX_TIMEOUT_SECONDS = 28 * 86400
+
+async def get_mute_backend(bot, guild_id: int) -> str:
+    """How a guild mutes members: 'role' (mute role plus channel overwrites) or 'timeout'"""
+    backend = await bot.db.get_guild_setting(guild_id, MUTE_BACKEND_SETTING)
+    if backend not in MUTE_BACKENDS:
+        backend = bot.config.get('default_mute_backend', 'role')
+    return backend
+
+class MuteScheduler:
+    """Expires timed mutes using a min-heap keyed by end time and a single timer"""
+
+    def __init__(self, bot, batch_size: int = 50):
+        self.bot = bot
+        self.batch_size = batch_size
+        self.logger = ModerationLogger(bot)
+
+        # Heap entries are [end_ts, mute_id, guild_id, user_id, valid]; cancelled
+        # entries are flagged invalid and discarded lazily when they reach the top
+        self._heap: List[list] = []
+        self._entries: Dict[Tuple[int, int], list] = {}
+        self._stale = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Load pending mutes from the database and start the expiry timer"""
+        superseded = []
+        for mute in sorted(await self.bot.db.get_pending_mutes(), key=lambda mute: mute['id']):
+            entry = [mute['end_epoch'], mute['id'], mute['guild_id'], mute['user_id'], True]
+            previous = self._replace_entry((mute['guild_id'], mute['user_id']), entry)
+            if previous is not None:
+                superseded.append(previous[1])
+            self._heap.append(entry)
+
+        # Rows left active by re-mutes before they were deactivated on replacement
+        if superseded:
+            await self.bot.db.remove_mutes(superseded)
+
+        heapq.heapify(self._heap)
+        self._task = asyncio.create_task(self._run())
+        logging.info(f"Mute scheduler started with {len(self._entries)} pending mutes")
+
+    async def stop(self):
+        """Stop the expiry timer"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, guild_id: int, user_id: int, mute_id: int, end_ts: float):
+        """Add or replace the pending expiry for a member
+
+        Callers deactivate the member's previous mute row before adding the new
+        one, so a replaced entry can't come back from the database on restart.
+        """
+        entry = [end_ts, mute_id, guild_id, user_id, True]
+        self._replace_entry((guild_id, user_id), entry)
+        heapq.heappush(self._heap, entry)
+
+        # Only a new earliest deadline needs to interrupt the current sleep
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def cancel(self, guild_id: int, user_id: int) -> bool:
+        """Cancel the pending expiry for a member (e.g. after a manual unmute)"""
+        entry = self._entries.pop((guild_id, user_id), None)
+        if entry is None:
+            return False
+
+        entry[4] = False
+        self._stale += 1
+        self._compact()
+        return True
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._entries)
+
+    def _replace_entry(self, key: Tuple[int, int], entry: list) -> Optional[list]:
+        """Make entry the member's pending expiry; returns the entry it replaced"""
+        previous = self._entries.get(key)
+        if previous is not None:
+            previous[4] = False
+            self._stale += 1
+        self._entries[key] = entry
+        return previous
+
+    def _compact(self):
+        """Rebuild the heap once cancelled entries make up most of it"""
+        if self._stale > 64 and self._stale * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if entry[4]]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _pop_due(self, now: float) -> List[list]:
+        """Pop up to batch_size valid entries whose end time has passed"""
+        due = []
+        while self._heap and len(due) < self.batch_size:
+            entry = self._heap[0]
+            if not entry[4]:
+                heapq.heappop(self._heap)
+                self._stale -= 1
+                continue
+            if entry[0] > now:
+                break
+            heapq.heappop(self._heap)
+            entry[4] = False
+            del self._entries[(entry[2], entry[3])]
+            due.append(entry)
+        return due
+
+    def _next_deadline(self) -> Optional[float]:
+        while self._heap and not self._heap[0][4]:
+            heapq.heappop(self._heap)
+            self._stale -= 1
+        return self._heap[0][0] if self._heap else None
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+
+        while True:
+            deadline = self._next_deadline()
+            self._wakeup.clear()
+
+            if deadline is None:
+                await self._wakeup.wait()
+                continue
+
+            delay = deadline - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    continue  # Woken by an earlier deadline
+                except asyncio.TimeoutError:
+                    pass
+
+            due = self._pop_due(time.time())
+            if due:
+                try:
+                    await self._expire(due)
+                except Exception as e:
+                    logging.error(f"Error expiring mutes: {e}")
+
+    async def _expire(self, entries: List[list]):
+        """Remove mute roles or timeouts and deactivate a batch of expired mutes"""
+        for _, _, guild_id, user_id, _ in entries:
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                continue
+
+            member = guild.get_member(user_id)
+            if not member:
+                continue
+
+            mute_role_id = await self.bot.db.get_mute_role(guild_id)
+            mute_role = guild.get_role(mute_role_id) if mute_role_id else None
+
+            try:
+                if mute_role and mute_role in member.roles:
+                    await member.remove_roles(mute_role, reason="Mute expired")
+                elif member.is_timed_out():
+                    # Timeouts lift themselves; this only clears a remainder left by clock drift
+                    await member.timeout(None, reason="Mute expired")
+                elif await get_mute_backend(self.bot, guild_id) != 'timeout':
+                    continue
+
+                await self.logger.log_action(
+                    guild, "Unmute", guild.me, member, "Mute expired",
+                    color=0x00FF00
+                )
+            except discord.Forbidden:
+                logging.warning(f"Cannot remove expired mute in {guild.name}")
+            except discord.HTTPException as e:
+                logging.error(f"Error removing expired mute in {guild.name}: {e}")
+
+        await self.bot.db.remove_mutes(entry[1] for entry in entries)
+        logging.info(f"Expired {len(entries)} mutes")
@@ -0,0 +1,127 @@
+import discord
+import zlib
+from typing import Any, Dict, List, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+SNAPSHOT_FORMAT = 1
+
+# Overwrite target types, matching the Discord API
+ROLE_TARGET = 0
+MEMBER_TARGET = 1
+
+def overwrite_entries(channel: discord.abc.GuildChannel) -> List[Tuple[int, int, int, int]]:
+    """A channel's overwrites as (target id, target type, allow, deny) tuples
+
+    Targets missing from the cache come back as typed discord.Object keys, so
+    overwrites for uncached members and deleted roles are still included.
+    """
+    entries = []
+    for target, overwrite in channel.overwrites.items():
+        is_role = isinstance(target, discord.Role) or getattr(target, 'type', None) is discord.Role
+        allow, deny = overwrite.pair()
+        entries.append((target.id, ROLE_TARGET if is_role else MEMBER_TARGET, allow.value, deny.value))
+    return entries
+
+def capture(guild: discord.Guild) -> Dict[str, Any]:
+    """Record every role's permissions and every channel's overwrites"""
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'roles': [[role.id, role.permissions.value] for role in guild.roles],
+        'channels': [
+            [channel.id, sorted(list(entry) for entry in overwrite_entries(channel))]
+            for channel in guild.channels
+        ]
+    }
+
+def encode(snapshot: Dict[str, Any]) -> bytes:
+    """Serialize a snapshot to compressed JSON"""
+    if ORJSON_AVAILABLE:
+        raw = orjson.dumps(snapshot)
+    else:
+        raw = json.dumps(snapshot, separators=(',', ':')).encode()
+    return zlib.compress(raw, 9)
+
+def decode(data: bytes) -> Dict[str, Any]:
+    raw = zlib.decompress(data)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+class PermissionDiff:
+    """Changes needed to bring a guild back to a snapshot
+
+    Each changed channel is restored with a single edit that replaces its whole
+    overwrite list, however many of its overwrites differ, and each changed role
+    with a single permissions edit.
+    """
+
+    def __init__(self):
+        # (role, snapshot permissions)
+        self.roles: List[Tuple[discord.Role, discord.Permissions]] = []
+        # (channel, snapshot overwrites, changed overwrite count)
+        self.channels: List[Tuple[discord.abc.GuildChannel, Dict[discord.Object, discord.PermissionOverwrite], int]] = []
+        # Roles and channels that were deleted since the snapshot and can't be restored
+        self.missing_roles = 0
+        self.missing_channels = 0
+
+    @property
+    def edit_count(self) -> int:
+        """Number of API calls a restore will make"""
+        return len(self.roles) + len(self.channels)
+
+    def describe(self) -> List[str]:
+        """One line per pending edit"""
+        lines = []
+        for role, permissions in self.roles:
+            granted = {name for name, value in permissions if value}
+            current = {name for name, value in role.permissions if value}
+            changes = [f"+{name}" for name in sorted(granted - current)]
+            changes += [f"-{name}" for name in sorted(current - granted)]
+            lines.append(f"🎭 {role.mention}: {' '.join(changes)}")
+        for channel, overwrites, changed in self.channels:
+            lines.append(f"📝 {channel.mention}: {changed} overwrite{'s differ' if changed != 1 else ' differs'}")
+        return lines
+
+def diff(snapshot: Dict[str, Any], guild: discord.Guild) -> PermissionDiff:
+    """Compare a decoded snapshot with the live guild"""
+    result = PermissionDiff()
+
+    for role_id, value in snapshot['roles']:
+        role = guild.get_role(role_id)
+        if role is None:
+            result.missing_roles += 1
+        elif role.permissions.value != value:
+            result.roles.append((role, discord.Permissions(value)))
+
+    for channel_id, entries in snapshot['channels']:
+        channel = guild.get_channel(channel_id)
+        if channel is None:
+            result.missing_channels += 1
+            continue
+
+        # Overwrites for deleted roles can't be restored, so they don't count as a difference
+        wanted = {
+            (target_id, target_type): (allow, deny)
+            for target_id, target_type, allow, deny in entries
+            if target_type != ROLE_TARGET or guild.get_role(target_id) is not None
+        }
+        live = {(target_id, target_type): (allow, deny) for target_id, target_type, allow, deny in overwrite_entries(channel)}
+        if wanted == live:
+            continue
+
+        changed = sum(live.get(key) != pair for key, pair in wanted.items())
+        changed += sum(key not in wanted for key in live)
+        overwrites = {
+            discord.Object(id=target_id, type=discord.Role if target_type == ROLE_TARGET else discord.Member):
+                discord.PermissionOverwrite.from_pair(discord.Permissions(allow), discord.Permissions(deny))
+            for (target_id, target_type), (allow, deny) in wanted.items()
+        }
+        result.channels.append((channel, overwrites, changed))
+
+    return result
@@ -1,4 +1,5 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
+import hmac
 import threading
 import logging
 import os
@@ -49,6 +50,40 @@ class WebServer:
                 'ready': self.bot.is_ready()
             }), 200
     
+        @self.app.route('/metrics/db')
+        def database_metrics():
+            """Per-method storage latency histograms, engine queue waits and guild settings cache counters"""
+            if not self.is_authorized():
+                return jsonify({
+                    'status': 'unauthorized',
+                    'message': 'Set METRICS_TOKEN and send it as a Bearer token, or query from localhost'
+                }), 401
+            
+            metrics = getattr(self.bot.db, 'metrics', None) if self.bot else None
+            if metrics is None:
+                return jsonify({
+                    'status': 'unavailable',
+                    'message': 'Database instrumentation is disabled'
+                }), 404
+            
+            snapshot = metrics.snapshot()
+            cache_stats = getattr(self.bot.db, 'settings_cache_stats', None)
+            if cache_stats:
+                snapshot['settings_cache'] = cache_stats()
+            return jsonify(snapshot), 200
+    
+    def is_authorized(self) -> bool:
+        """Check access to internal endpoints
+        
+        With METRICS_TOKEN set the request must carry it as a Bearer token;
+        without it only requests from the local machine are allowed.
+        """
+        token = os.getenv('METRICS_TOKEN')
+        if token:
+            header = request.headers.get('Authorization', '')
+            return hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
+        return request.remote_addr in ('127.0.0.1', '::1')
+    
     def run(self, host='0.0.0.0', port=8080):
         """Run the Flask web server"""
         try: